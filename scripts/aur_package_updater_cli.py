@@ -1,18 +1,34 @@
 #!/usr/bin/env python3
 
 import argparse
+import asyncio
+import functools
 import json
 import os
 import subprocess
 import sys
 import tempfile
-import glob
 import logging
+import marshal
+import math
+import shutil
 from awesomeversion import AwesomeVersion
 import pyalpm
-import gzip
+import codecs
+import hashlib
+import importlib.util
+import random
+import re
+import sqlite3
+import threading
 import time
+import tomllib
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional
+from urllib.parse import quote, urlsplit
+import requests
+from requests.adapters import HTTPAdapter
 
 # --- Constants ---
 # Default logger if the script is run standalone.
@@ -21,6 +37,91 @@ DEFAULT_LOGGER = logging.getLogger("aur_updater_cli")
 CACHE_FILE_PATH = os.path.join(
     tempfile.gettempdir(), "aur_package_updater_cli_cache.json.gz"
 )
+# File names inside --cache-dir, which persists between runs.
+PKGBUILD_CACHE_FILENAME = "pkgbuild_cache.json"
+LOCAL_STATE_FILENAME = "local_state.json"
+AUR_METADATA_FILENAME = "packages-meta-ext-v1.json.gz"
+# Sidecar next to the cached dump: validators and fetch time for revalidation
+AUR_METADATA_INFO_SUFFIX = ".info.json"
+AUR_INDEX_FILENAME = "aur_index.sqlite3"
+AUR_INDEX_SCHEMA_VERSION = 1
+# Sidecar holding the filtered maintainer subset of the cached dump
+AUR_SUBSET_SNAPSHOT_SUFFIX = ".subset.marshal"
+AUR_SUBSET_SNAPSHOT_SCHEMA_VERSION = 1
+STATE_SCHEMA_VERSION = 1
+# Hard limit for one pkgbuild_to_json.py run; results streamed before it are kept.
+LOCAL_EXTRACT_TIMEOUT = 100
+
+AUR_RPC_URL = "https://aur.archlinux.org/rpc/v5"
+# /info requests carry one arg[] per package; keep each URL well below what
+# the AUR web server accepts
+AUR_RPC_INFO_MAX_URL_LENGTH = 4000
+# AUR metadata dump, streamed and filtered record by record
+# AUR_METADATA_URL = "https://aur.archlinux.org/packages-meta-ext-v1.json.gz"
+AUR_METADATA_URL = "https://aur.manjaro.org/packages-meta-ext-v1.json.gz"
+STREAM_CHUNK_SIZE = 64 * 1024
+# A single package record larger than this means the stream is not what we expect
+MAX_JSON_RECORD_BYTES = 4 * 1024 * 1024
+# A cached dump younger than this is used without asking the server
+DEFAULT_AUR_CACHE_TTL = 3600
+
+# Shared HTTP client: (connect, read) timeouts, concurrent requests per host,
+# and the ceiling for one exponential backoff sleep
+HTTP_TIMEOUT = (10, 30)
+HTTP_MAX_PER_HOST = 4
+HTTP_BACKOFF_CAP = 120
+HTTP_USER_AGENT = "aur_package_updater_cli (+https://github.com/envolution/aur)"
+
+# AUR metadata field for each ownership predicate, and whether it holds a list
+AUR_OWNERSHIP_FIELDS = {
+    "maintainer": ("Maintainer", False),
+    "comaintainers": ("CoMaintainers", True),
+}
+
+# nvchecker runs as parallel shards. Each shard gets its own timeout, and the
+# shard count grows past the CPU count when the last run's per-package latency
+# would not fit a shard into NVCHECKER_SHARD_BUDGET of that timeout.
+NVCHECKER_SHARD_TIMEOUT = 180
+NVCHECKER_SHARD_BUDGET = 0.5
+NVCHECKER_MAX_SHARDS = 16
+NVCHECKER_STATS_FILENAME = "nvchecker_stats.json"
+# The in-process engine checks everything in one event loop, with nvchecker's
+# default per-process concurrency for each shard the subprocess engine would use.
+NVCHECKER_ENGINES = ("subprocess", "inprocess")
+NVCHECKER_MAX_CONCURRENCY = 20
+# Opt-in cache of upstream versions (--nvchecker-cache-ttl), keyed by entry
+# name and invalidated whenever that entry's config block changes.
+NVCHECKER_VERSION_CACHE_FILENAME = "nvchecker_versions.json"
+# Adaptive scheduling (--nvchecker-schedule) checks an entry again after this
+# fraction of its typical release gap, give or take the jitter, and at least
+# every NVCHECKER_SCHEDULE_MAX_INTERVAL. Gaps come from the last
+# NVCHECKER_HISTORY_LENGTH upstream version changes.
+NVCHECKER_SCHEDULE_FRACTION = 0.1
+NVCHECKER_SCHEDULE_MAX_INTERVAL = 4 * 24 * 3600
+NVCHECKER_SCHEDULE_JITTER = 0.2
+NVCHECKER_HISTORY_LENGTH = 10
+# GitHub tokens are pooled from the key file's github/github.com/github_pool
+# keys and the GITHUB_TOKEN/GITHUB_TOKENS environment variables. Each GitHub
+# API request picks the token with the most quota left; checks are deferred
+# once every token is down to its reserve. Shards get the pool through the
+# NVCHECKER_POOL_ENV environment variable.
+GITHUB_API_HOST = "api.github.com"
+GITHUB_RATE_LIMIT_URL = f"https://{GITHUB_API_HOST}/rate_limit"
+GITHUB_RATE_LIMIT_RESOURCES = ("core", "graphql")
+GITHUB_TOKEN_RESERVE = 50
+NVCHECKER_POOL_ENV = "AUR_UPDATER_GITHUB_POOL"
+# python -c program for a pooled shard: <script dir> <module> <nvchecker args>
+NVCHECKER_POOL_BOOTSTRAP = (
+    "import importlib, sys; sys.path.insert(0, sys.argv.pop(1)); "
+    "importlib.import_module(sys.argv.pop(1)).nvchecker_pool_main()"
+)
+
+# Package discovery: files collected per package directory, directories never
+# descended into (dot-directories are always skipped), and makepkg's build
+# leftovers that are skipped inside a directory holding a PKGBUILD
+DISCOVERY_FILENAMES = ("PKGBUILD", ".nvchecker.toml")
+DEFAULT_IGNORED_DIRS = ("abandoned", "nomaintain")
+PACKAGE_BUILD_DIRS = ("src", "pkg")
 
 
 # --- Version Comparison Function (Configurable tool priority) ---
@@ -142,8 +243,97 @@ def _get_full_version_string(v_str, r_str):
     return v_str
 
 
+# --- HTTP Client ---
+class HttpClient:
+    """
+    One requests.Session shared by every AUR call: pooled keep-alive
+    connections, gzip content encoding, and at most max_per_host requests in
+    flight per host. Streaming callers hold a host slot via acquire()/release()
+    for as long as they read the body.
+    """
+
+    def __init__(self, max_per_host=HTTP_MAX_PER_HOST):
+        self.max_per_host = max_per_host
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = HTTP_USER_AGENT
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_per_host)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._slots[host]
+
+    def acquire(self, url):
+        self._slot(url).acquire()
+
+    def release(self, url):
+        self._slot(url).release()
+
+    def get(self, url, headers=None, stream=False, timeout=HTTP_TIMEOUT):
+        """GET url; non-streamed responses are read before the slot is freed."""
+        self.acquire(url)
+        try:
+            response = self.session.get(
+                url, headers=headers, stream=stream, timeout=timeout
+            )
+        except BaseException:
+            self.release(url)
+            raise
+        if stream:
+            return response  # caller releases the slot
+        try:
+            response.content
+        finally:
+            self.release(url)
+        return response
+
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """The process-wide HttpClient, created on first use."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = HttpClient()
+        return _http_client
+
+
+def backoff_delay(attempt, retry_delay, error=None):
+    """
+    Exponential backoff with jitter for retry number `attempt` (0-based):
+    half the capped exponential step plus a random share of the other half, so
+    parallel callers do not retry in lockstep. A Retry-After header on the
+    failed response is honoured as a lower bound.
+    """
+    step = min(HTTP_BACKOFF_CAP, retry_delay * (2**attempt))
+    delay = step / 2 + random.uniform(0, step / 2)
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        delay = max(delay, min(int(retry_after), HTTP_BACKOFF_CAP))
+    return delay
+
+
 def fetch_aur_data(
-    ownership, maintainer, data_source="rpc", logger=None, max_retries=5, retry_delay=60
+    ownership,
+    maintainer,
+    data_source="rpc",
+    logger=None,
+    max_retries=5,
+    retry_delay=5,
+    cache_path=None,
+    cache_ttl=DEFAULT_AUR_CACHE_TTL,
+    index_path=None,
+    pkgnames=None,
 ):
     """
     Fetch AUR package data using either RPC API or metadata file.
@@ -151,481 +341,2232 @@ def fetch_aur_data(
     Args:
         ownership: The field to filter on (e.g., 'maintainer')
         maintainer: The value to filter for
-        data_source: Data collection method - either 'rpc' or 'file' (default: 'rpc')
+        data_source: Data collection method - 'rpc', 'file' or 'info' (default: 'rpc')
         logger: Logger instance (optional)
-        max_retries: Maximum number of retry attempts on failure (default: 3)
-        retry_delay: Delay between retries in whole seconds (default: 1)
+        max_retries: Maximum number of retry attempts on failure (default: 5)
+        retry_delay: Base delay for the jittered exponential backoff in seconds
+            (default: 5)
+        cache_path: Where 'file' mode keeps the metadata dump (default: temp dir)
+        cache_ttl: Seconds the cached dump is used without revalidation
+        index_path: SQLite index of the dump kept next to it (optional)
+        pkgnames: Package names to look up ('info' mode only)
 
     Returns:
         Dict[str, Dict[str, Any]]: Dictionary of package data keyed by package base name
     """
+    return fetch_aur_data_multi(
+        [ownership],
+        maintainer,
+        data_source=data_source,
+        logger=logger,
+        max_retries=max_retries,
+        retry_delay=retry_delay,
+        cache_path=cache_path,
+        cache_ttl=cache_ttl,
+        index_path=index_path,
+        pkgnames=pkgnames,
+    )[ownership]
+
+
+def fetch_aur_data_multi(
+    ownerships,
+    maintainer,
+    data_source="rpc",
+    logger=None,
+    max_retries=5,
+    retry_delay=5,
+    optional=(),
+    cache_path=None,
+    cache_ttl=DEFAULT_AUR_CACHE_TTL,
+    index_path=None,
+    pkgnames=None,
+):
+    """
+    Fetch AUR package data for several ownership predicates at once.
+
+    Args:
+        ownerships: Fields to filter on (any of 'maintainer', 'comaintainers')
+        maintainer: The value to filter for
+        data_source: Data collection method - 'rpc', 'file' or 'info' (default: 'rpc')
+        logger: Logger instance (optional)
+        max_retries: Maximum number of retry attempts on failure
+        retry_delay: Base delay for the jittered exponential backoff in seconds
+        optional: Ownerships whose RPC failure is logged and yields no packages
+                  instead of raising
+        cache_path: Where 'file' mode keeps the metadata dump (default: temp dir)
+        cache_ttl: Seconds the cached dump is used without revalidation
+        index_path: SQLite index of the dump kept next to it (optional)
+        pkgnames: Package names to look up; required in 'info' mode, which
+                  only returns packages from this list
+
+    Returns:
+        Dict[str, Dict[str, Dict[str, Any]]]: Package data keyed by package base
+        name, per ownership. In 'file' mode the metadata dump is decompressed
+        and scanned once for all predicates; in 'info' mode the named packages
+        are fetched in batches and filtered the same way.
+    """
     if logger is None:
         logger = logging.getLogger(__name__)
 
-    if data_source not in ["rpc", "file"]:
-        raise ValueError(f"data_source must be 'rpc' or 'file', got '{data_source}'")
+    if data_source not in ["rpc", "file", "info"]:
+        raise ValueError(
+            f"data_source must be 'rpc', 'file' or 'info', got '{data_source}'"
+        )
+    if data_source == "info" and pkgnames is None:
+        raise ValueError("data_source 'info' needs the list of package names")
+    unknown = set(ownerships) - set(AUR_OWNERSHIP_FIELDS)
+    if unknown:
+        raise ValueError(f"Unsupported ownership predicate(s): {sorted(unknown)}")
 
     aur_logger = logger.getChild(f"aur_{data_source}")
 
-    if data_source == "rpc":
-        return _fetch_aur_data_rpc(
-            ownership, maintainer, aur_logger, max_retries, retry_delay
-        )
-    else:  # data_source == 'file'
+    if data_source == "file":
         return _fetch_aur_data_file(
-            ownership, maintainer, aur_logger, max_retries, retry_delay
+            ownerships,
+            maintainer,
+            aur_logger,
+            max_retries,
+            retry_delay,
+            cache_path or CACHE_FILE_PATH,
+            cache_ttl,
+            index_path,
+        )
+    if data_source == "info":
+        return _fetch_aur_data_info(
+            ownerships, maintainer, pkgnames, aur_logger, max_retries, retry_delay
         )
 
+    # The RPC search endpoint takes a single 'by' field per request.
+    results = {}
+    for ownership in ownerships:
+        try:
+            results[ownership] = _fetch_aur_data_rpc(
+                ownership, maintainer, aur_logger, max_retries, retry_delay
+            )
+        except Exception as e:
+            if ownership not in optional:
+                raise
+            aur_logger.warning(
+                f"Could not fetch '{ownership}' data for '{maintainer}', proceeding without it: {e}"
+            )
+            results[ownership] = {}
+    return results
 
-def _fetch_aur_data_rpc(ownership, maintainer, aur_logger, max_retries, retry_delay):
-    """Internal function to fetch AUR data via RPC API."""
-    url = f"https://aur.archlinux.org/rpc/v5/search/{maintainer}?by={ownership}"
-    aur_logger.info(f"Querying AUR RPC for '{ownership}' key '{maintainer}' at: {url}")
+
+def _rpc_request(url, what, aur_logger, max_retries, retry_delay):
+    """GET an AUR RPC URL with retries; returns the validated response dict."""
+    client = get_http_client()
 
     for attempt in range(max_retries):
+        error = None
         try:
             aur_logger.debug(f"RPC attempt {attempt + 1}/{max_retries}")
-            process = subprocess.run(
-                ["curl", "-s", url],
-                capture_output=True,
-                text=True,
-                check=True,
-                timeout=10,  # Reduced timeout
-            )
+            response = client.get(url)
+            response.raise_for_status()
+            body = response.text
 
             # Basic validation
-            if not process.stdout.strip().startswith(
-                "{"
-            ) or not process.stdout.strip().endswith("}"):
-                raise json.JSONDecodeError(
-                    "Invalid JSON response from RPC.", process.stdout, 0
-                )
+            if not body.strip().startswith("{") or not body.strip().endswith("}"):
+                raise json.JSONDecodeError("Invalid JSON response from RPC.", body, 0)
 
-            data = json.loads(process.stdout)
+            data = json.loads(body)
 
             # API itself reports error → treat as failure (retryable)
             if data.get("type") == "error":
-                raise RuntimeError(
-                    f"AUR API error for '{ownership}' key '{maintainer}': {data.get('error')}"
-                )
+                raise RuntimeError(f"AUR API error for {what}: {data.get('error')}")
 
             # More robust validation
             if not isinstance(data, dict) or "resultcount" not in data:
                 raise ValueError("Unexpected JSON structure from AUR RPC.")
 
-            # Valid but empty
-            if data.get("resultcount", 0) == 0:
-                aur_logger.info(
-                    f"No packages found on AUR for '{ownership}' key '{maintainer}'."
-                )
-                return {}
-
-            # Normal case: build dict
-            aur_data_by_pkgbase = {}
-            for result in data.get("results", []):
-                name, base_name, full_ver = (
-                    result["Name"],
-                    result["PackageBase"],
-                    result["Version"],
-                )
-                ver_no_epoch = full_ver.split(":", 1)[-1]
-                parts = ver_no_epoch.rsplit("-", 1)
-                base_v, rel_v = (
-                    parts[0],
-                    (parts[1] if len(parts) > 1 and parts[1].isdigit() else "0"),
-                )
-                if base_name not in aur_data_by_pkgbase:
-                    aur_data_by_pkgbase[base_name] = {
-                        "aur_actual_pkgname": name,
-                        "aur_pkgbase_reported": base_name,
-                        "aur_pkgver": base_v,
-                        "aur_pkgrel": rel_v,
-                    }
-
-            aur_logger.info(
-                f"Fetched info for {len(aur_data_by_pkgbase)} unique PkgBase(s) from AUR RPC for '{maintainer}'."
-            )
-            return aur_data_by_pkgbase
+            return data
 
         except (
-            subprocess.TimeoutExpired,
-            subprocess.CalledProcessError,
+            requests.RequestException,
             json.JSONDecodeError,
             ValueError,
             RuntimeError,
         ) as e:
+            error = e
             aur_logger.warning(
-                f"AUR RPC error on attempt {attempt + 1}/{max_retries} "
-                f"for '{ownership}' key '{maintainer}': {e}"
+                f"AUR RPC error on attempt {attempt + 1}/{max_retries} for {what}: {e}"
             )
 
         # delay before retry unless last attempt
         if attempt < max_retries - 1:
-            delay = retry_delay * (2**attempt)
-            aur_logger.info(f"Retrying in {delay} seconds...")
+            delay = backoff_delay(attempt, retry_delay, error)
+            aur_logger.info(f"Retrying in {delay:.1f} seconds...")
             time.sleep(delay)
 
     # If we’re here, all retries failed
-    aur_logger.error(
-        f"All {max_retries} RPC attempts failed for '{ownership}' key '{maintainer}'"
-    )
-    raise RuntimeError(
-        f"AUR RPC failed after {max_retries} attempts for '{ownership}' key '{maintainer}'"
+    aur_logger.error(f"All {max_retries} RPC attempts failed for {what}")
+    raise RuntimeError(f"AUR RPC failed after {max_retries} attempts for {what}")
+
+
+def _fetch_aur_data_rpc(ownership, maintainer, aur_logger, max_retries, retry_delay):
+    """Internal function to fetch AUR data via RPC API."""
+    url = f"{AUR_RPC_URL}/search/{maintainer}?by={ownership}"
+    aur_logger.info(f"Querying AUR RPC for '{ownership}' key '{maintainer}' at: {url}")
+    data = _rpc_request(
+        url,
+        f"'{ownership}' key '{maintainer}'",
+        aur_logger,
+        max_retries,
+        retry_delay,
     )
 
+    # Valid but empty
+    if data.get("resultcount", 0) == 0:
+        aur_logger.info(
+            f"No packages found on AUR for '{ownership}' key '{maintainer}'."
+        )
+        return {}
 
-def _fetch_aur_data_file(ownership, maintainer, aur_logger, max_retries, retry_delay):
-    """Internal function to fetch AUR data from metadata file."""
-    # url = "https://aur.archlinux.org/packages-meta-ext-v1.json.gz"
-    url = "https://aur.manjaro.org/packages-meta-ext-v1.json.gz"
-    raw_gzipped_data = None
+    # Normal case: build dict
     aur_data_by_pkgbase = {}
+    for result in data.get("results", []):
+        name, base_name, full_ver = (
+            result["Name"],
+            result["PackageBase"],
+            result["Version"],
+        )
+        ver_no_epoch = full_ver.split(":", 1)[-1]
+        parts = ver_no_epoch.rsplit("-", 1)
+        base_v, rel_v = (
+            parts[0],
+            (parts[1] if len(parts) > 1 and parts[1].isdigit() else "0"),
+        )
+        if base_name not in aur_data_by_pkgbase:
+            aur_data_by_pkgbase[base_name] = {
+                "aur_actual_pkgname": name,
+                "aur_pkgbase_reported": base_name,
+                "aur_pkgver": base_v,
+                "aur_pkgrel": rel_v,
+            }
 
-    # Try cache first
-    if os.path.exists(CACHE_FILE_PATH):
-        aur_logger.info(f"Found cached metadata file at '{CACHE_FILE_PATH}'.")
-        try:
-            with open(CACHE_FILE_PATH, "rb") as f:
-                raw_gzipped_data = f.read()
-            if not raw_gzipped_data:
-                aur_logger.warning("Cached file is empty, will re-download.")
-                raw_gzipped_data = None
+    aur_logger.info(
+        f"Fetched info for {len(aur_data_by_pkgbase)} unique PkgBase(s) from AUR RPC for '{maintainer}'."
+    )
+    return aur_data_by_pkgbase
+
+
+def rpc_info_urls(pkgnames):
+    """Split pkgnames into /info request URLs below the URL length limit."""
+    prefix = f"{AUR_RPC_URL}/info?"
+    urls, args, length = [], [], len(prefix)
+    for name in pkgnames:
+        arg = f"arg%5B%5D={quote(name, safe='')}"  # arg[]
+        if args and length + 1 + len(arg) > AUR_RPC_INFO_MAX_URL_LENGTH:
+            urls.append(prefix + "&".join(args))
+            args, length = [], len(prefix)
+        length += len(arg) + (1 if args else 0)
+        args.append(arg)
+    if args:
+        urls.append(prefix + "&".join(args))
+    return urls
+
+
+def _fetch_aur_data_info(
+    ownerships, maintainer, pkgnames, aur_logger, max_retries, retry_delay
+):
+    """
+    Internal function to fetch AUR data for known package names via the RPC
+    info endpoint. Names are batched many per request and the batches are sent
+    concurrently (bounded by the HTTP client's per-host limit); the records
+    returned are then filtered by the ownership predicates like the dump.
+    """
+    maintainer_lower = maintainer.lower()
+    urls = rpc_info_urls(sorted(set(pkgnames)))
+    aur_logger.info(
+        f"Querying AUR RPC info for {len(set(pkgnames))} package name(s) "
+        f"in {len(urls)} request(s)."
+    )
+
+    def fetch(numbered_url):
+        number, url = numbered_url
+        what = f"info batch {number}/{len(urls)}"
+        return _rpc_request(url, what, aur_logger, max_retries, retry_delay)
+
+    with ThreadPoolExecutor(max_workers=HTTP_MAX_PER_HOST) as pool:
+        responses = list(pool.map(fetch, enumerate(urls, 1)))
+
+    results = {ownership: {} for ownership in ownerships}
+    filtered_counts = {ownership: 0 for ownership in ownerships}
+    total = 0
+    for data in responses:
+        for pkg in data.get("results", []):
+            total += 1
+            if not isinstance(pkg, dict):
+                continue
+            matched = _matching_ownerships(pkg, ownerships, maintainer_lower)
+            if not matched:
+                continue
+            base_name, entry = _aur_entry_from_pkg(pkg, aur_logger)
+            for ownership in matched:
+                filtered_counts[ownership] += 1
+                if base_name and base_name not in results[ownership]:
+                    results[ownership][base_name] = entry
+    aur_logger.info(f"AUR RPC info returned {total} package(s).")
+    for ownership in ownerships:
+        aur_logger.info(
+            f"Found {filtered_counts[ownership]} packages for '{ownership}' key '{maintainer}'"
+        )
+    return results
+
+
+def iter_json_array(text_chunks):
+    """
+    Yield the elements of a top-level JSON array from an iterable of text
+    chunks. Only the current element and the unread part of one chunk are held
+    in memory, so the whole document never has to be materialized.
+    """
+    decoder = json.JSONDecoder()
+    whitespace = " \t\n\r"
+    number = "0123456789+-.eE"
+    buf, pos = "", 0
+    state = "start"  # start -> value|close -> comma|close -> ... -> done
+    for chunk in text_chunks:
+        buf = buf[pos:] + chunk
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in whitespace:
+                pos += 1
+            if pos >= len(buf):
+                break
+            ch = buf[pos]
+            if state == "done":
+                raise json.JSONDecodeError("Extra data after JSON array", buf, pos)
+            if state == "start":
+                if ch != "[":
+                    raise json.JSONDecodeError("Expected a JSON array", buf, pos)
+                state, pos = "first", pos + 1
+            elif ch == "]" and state in ("first", "comma"):
+                state, pos = "done", pos + 1
+            elif state == "comma":
+                if ch != ",":
+                    raise json.JSONDecodeError("Expected ',' or ']'", buf, pos)
+                state, pos = "value", pos + 1
             else:
-                aur_logger.info(
-                    f"Loaded {len(raw_gzipped_data)} bytes from cached metadata file."
-                )
-        except Exception as e:
-            aur_logger.warning(
-                f"Error reading cache file '{CACHE_FILE_PATH}': {e}. Re-downloading."
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    # Most likely the element continues in the next chunk
+                    if len(buf) - pos > MAX_JSON_RECORD_BYTES:
+                        raise
+                    break
+                if type(value) in (int, float) and not buf[end:].lstrip(number):
+                    break  # The next chunk may hold more of the number
+                state, pos = "comma", end
+                yield value
+    if state in ("first", "value") and buf[pos:].strip():
+        # An element held back for more input that never came: report why
+        # it does not decode rather than just the missing ']'
+        decoder.raw_decode(buf, pos)
+    if state != "done":
+        raise json.JSONDecodeError("Unterminated JSON array", buf, pos)
+
+
+def _gunzip_text_chunks(byte_chunks):
+    """Decompress a gzip byte stream and decode it as UTF-8, chunk by chunk."""
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in byte_chunks:
+        text = decoder.decode(decompressor.decompress(chunk))
+        if text:
+            yield text
+    if not decompressor.eof:
+        raise EOFError("Compressed metadata stream ended before the end marker")
+    tail = decoder.decode(decompressor.flush(), final=True)
+    if tail:
+        yield tail
+
+
+def _iter_cached_metadata_bytes(path):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+class _MetadataDownload:
+    """
+    Streams the dump through the shared HTTP client while teeing it into a
+    temp file next to cache_path. commit() moves the copy into place once the
+    caller has consumed and validated the whole stream; close() discards it
+    otherwise.
+
+    With etag/last_modified the request is conditional; not_modified() tells
+    whether the server answered 304. Validators of the response are available
+    as .etag/.last_modified.
+    """
+
+    def __init__(self, url, cache_path, aur_logger, etag=None, last_modified=None):
+        self.url = url
+        self.cache_path = cache_path
+        self.aur_logger = aur_logger
+        self.received = 0
+        self._tmp_path = None
+        self._cache_file = None
+        try:
+            fd, self._tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(cache_path),
+                prefix=f".{os.path.basename(cache_path)}.",
+            )
+            self._cache_file = os.fdopen(fd, "wb")
+        except OSError as e:
+            aur_logger.warning(f"Not caching metadata file to '{cache_path}': {e}")
+        # The dump is gzip already; ask for it as is so the cached copy is the
+        # exact file served.
+        headers = {"Accept-Encoding": "identity"}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        self.client = get_http_client()
+        self.response = None
+        try:
+            # No overall deadline: the consumer filters while downloading, so
+            # only a stalled transfer (read timeout) is treated as a failure.
+            self.response = self.client.get(url, headers=headers, stream=True)
+            self.status = self.response.status_code
+            self.etag = self.response.headers.get("ETag")
+            self.last_modified = self.response.headers.get("Last-Modified")
+            if self.status != 304:
+                self.response.raise_for_status()
+        except BaseException:
+            self.close()
+            raise
+
+    def not_modified(self):
+        return self.status == 304
+
+    def __iter__(self):
+        for chunk in self.response.iter_content(STREAM_CHUNK_SIZE):
+            self.received += len(chunk)
+            if self._cache_file is not None:
+                self._cache_file.write(chunk)
+            yield chunk
+        if not self.received:
+            raise RuntimeError("Empty response from server")
+        self.aur_logger.debug(f"Downloaded {self.received} bytes of compressed data")
+
+    def commit(self):
+        """Move the validated copy into place; True if the cache was updated."""
+        if self._cache_file is None:
+            return False
+        try:
+            self._cache_file.close()
+            self._cache_file = None
+            os.replace(self._tmp_path, self.cache_path)
+            self._tmp_path = None
+            self.aur_logger.info(f"Cached metadata file to '{self.cache_path}'.")
+            return True
+        except OSError as e:
+            self.aur_logger.warning(
+                f"Failed to write cache file '{self.cache_path}': {e}"
             )
-            raw_gzipped_data = None
+            return False
+
+    def close(self):
+        if self.response is not None:
+            self.response.close()
+            self.response = None
+            self.client.release(self.url)
+        if self._cache_file is not None:
+            self._cache_file.close()
+            self._cache_file = None
+        if self._tmp_path is not None:
+            try:
+                os.remove(self._tmp_path)
+            except OSError:
+                pass
+            self._tmp_path = None
 
-    # Download if cache was missing or bad
-    if not raw_gzipped_data:
-        aur_logger.info(
-            f"Downloading AUR metadata file for '{ownership}' key '{maintainer}' from: {url}"
+
+def _aur_entry_from_pkg(pkg, aur_logger):
+    """Map one AUR package record to (pkgbase, aur data entry)."""
+    name = pkg.get("Name")
+    base_name = pkg.get("PackageBase", name)
+    full_ver = pkg.get("Version")
+
+    if not all([name, base_name, full_ver]):
+        aur_logger.warning(
+            f"Skipping package with missing required fields: "
+            f"Name={name}, PackageBase={base_name}, Version={full_ver}"
+        )
+        return None, None
+
+    ver_no_epoch = full_ver.split(":", 1)[-1]
+    parts = ver_no_epoch.rsplit("-", 1)
+    base_v = parts[0]
+    rel_v = parts[1] if len(parts) > 1 and parts[1].isdigit() else "0"
+
+    return base_name, {
+        "aur_actual_pkgname": name,
+        "aur_pkgbase_reported": base_name,
+        "aur_pkgver": base_v,
+        "aur_pkgrel": rel_v,
+    }
+
+
+def _matching_ownerships(pkg, ownerships, maintainer_lower):
+    """Ownership predicates from `ownerships` that this AUR record satisfies."""
+    matched = []
+    for ownership in ownerships:
+        field, is_list = AUR_OWNERSHIP_FIELDS[ownership]
+        value = pkg.get(field)
+        if is_list:
+            if isinstance(value, list) and any(
+                isinstance(v, str) and v.lower() == maintainer_lower for v in value
+            ):
+                matched.append(ownership)
+        elif isinstance(value, str) and value.lower() == maintainer_lower:
+            matched.append(ownership)
+    return matched
+
+
+# --- AUR metadata index ---
+# SQLite copy of the dump fields we query, kept in step with the cached dump so
+# later runs answer ownership/provides lookups without decoding it again.
+AUR_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS packages (
+    name TEXT PRIMARY KEY,
+    id INTEGER,
+    pkgbase TEXT,
+    version TEXT,
+    maintainer TEXT COLLATE NOCASE,
+    last_modified INTEGER,
+    digest INTEGER
+);
+CREATE TABLE IF NOT EXISTS comaintainers (
+    name TEXT NOT NULL,
+    comaintainer TEXT NOT NULL COLLATE NOCASE
+);
+CREATE TABLE IF NOT EXISTS provides (name TEXT NOT NULL, provides TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS packages_maintainer ON packages (maintainer);
+CREATE INDEX IF NOT EXISTS comaintainers_comaintainer ON comaintainers (comaintainer);
+CREATE INDEX IF NOT EXISTS comaintainers_name ON comaintainers (name);
+CREATE INDEX IF NOT EXISTS provides_provides ON provides (provides);
+CREATE INDEX IF NOT EXISTS provides_name ON provides (name);
+"""
+# "foo>=1.2" provides "foo"
+PROVIDES_NAME_RE = re.compile(r"[<>=]")
+
+
+def open_aur_index(path, logger=DEFAULT_LOGGER):
+    """Open (creating if needed) the AUR index at path, or None if unusable."""
+    try:
+        conn = sqlite3.connect(path)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != AUR_INDEX_SCHEMA_VERSION:
+            if version:
+                logger.info(f"AUR index '{path}' has an old schema, rebuilding it.")
+            for table in ("meta", "packages", "comaintainers", "provides"):
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.executescript(AUR_INDEX_SCHEMA)
+            conn.execute(f"PRAGMA user_version = {AUR_INDEX_SCHEMA_VERSION}")
+            conn.commit()
+        return conn
+    except sqlite3.Error as e:
+        logger.warning(f"Not using AUR index '{path}': {e}")
+        return None
+
+
+def _dump_identity(path):
+    """Cheap identity of the cached dump the index was built from."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def aur_index_matches(conn, dump_path):
+    row = conn.execute("SELECT value FROM meta WHERE key = 'dump'").fetchone()
+    return row is not None and row[0] == _dump_identity(dump_path)
+
+
+class _AurIndexRefresh:
+    """
+    Incremental refresh fed one dump record at a time. Only records whose
+    indexed fields changed are rewritten; packages missing from the dump are
+    removed by finish(). Nothing is committed before then.
+
+    LastModified alone is not enough: adopting or disowning a package changes
+    Maintainer/CoMaintainers without bumping it. Rows are compared by a digest
+    over every indexed field, LastModified included.
+    """
+
+    FIELDS = (
+        "ID",
+        "PackageBase",
+        "Version",
+        "Maintainer",
+        "CoMaintainers",
+        "Provides",
+        "LastModified",
+    )
+
+    def __init__(self, conn, logger):
+        self.conn = conn
+        self.logger = logger
+        self.known = dict(conn.execute("SELECT name, digest FROM packages"))
+        self.seen = set()
+        self.changed = 0
+        self.failed = False
+
+    def add(self, pkg):
+        if self.failed:
+            return
+        try:
+            self._add(pkg)
+        except sqlite3.Error as e:
+            self.logger.warning(f"AUR index update failed, leaving it as it was: {e}")
+            self.abort()
+
+    def _add(self, pkg):
+        name = pkg.get("Name")
+        if not isinstance(name, str) or name in self.seen:
+            return
+        self.seen.add(name)
+        values = tuple(pkg.get(field) for field in self.FIELDS)
+        digest = int.from_bytes(
+            hashlib.blake2b(repr(values).encode(), digest_size=8).digest(),
+            "big",
+            signed=True,
+        )
+        if self.known.get(name) == digest:
+            return
+        self.changed += 1
+        maintainer = pkg.get("Maintainer")
+        self.conn.execute(
+            "INSERT OR REPLACE INTO packages VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                name,
+                pkg.get("ID"),
+                pkg.get("PackageBase"),
+                pkg.get("Version"),
+                maintainer if isinstance(maintainer, str) else None,
+                pkg.get("LastModified"),
+                digest,
+            ),
+        )
+        if name in self.known:
+            self.conn.execute("DELETE FROM comaintainers WHERE name = ?", (name,))
+            self.conn.execute("DELETE FROM provides WHERE name = ?", (name,))
+        comaintainers = pkg.get("CoMaintainers") or []
+        self.conn.executemany(
+            "INSERT INTO comaintainers VALUES (?, ?)",
+            [(name, c) for c in set(comaintainers) if isinstance(c, str)],
+        )
+        provides = {
+            PROVIDES_NAME_RE.split(p, 1)[0]
+            for p in pkg.get("Provides") or []
+            if isinstance(p, str)
+        }
+        self.conn.executemany(
+            "INSERT INTO provides VALUES (?, ?)", [(name, p) for p in provides if p]
+        )
+
+    def finish(self, dump_path):
+        if self.failed:
+            return
+        gone = [(name,) for name in self.known.keys() - self.seen]
+        try:
+            for table in ("packages", "comaintainers", "provides"):
+                self.conn.executemany(f"DELETE FROM {table} WHERE name = ?", gone)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('dump', ?)",
+                (_dump_identity(dump_path),),
+            )
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.logger.warning(f"AUR index update failed, leaving it as it was: {e}")
+            self.abort()
+            return
+        self.logger.info(
+            f"AUR index refreshed: {self.changed} changed, {len(gone)} removed, "
+            f"{len(self.seen)} total packages."
+        )
+
+    def abort(self):
+        self.failed = True
+        self.conn.rollback()
+
+
+def query_aur_index(conn, ownerships, maintainer, aur_logger):
+    """Answer an ownership lookup from the index; same shape as a dump scan."""
+    queries = {
+        "maintainer": "SELECT name, pkgbase, version FROM packages "
+        "WHERE maintainer = ? ORDER BY id",
+        "comaintainers": "SELECT name, pkgbase, version FROM packages "
+        "WHERE name IN (SELECT name FROM comaintainers WHERE comaintainer = ?) "
+        "ORDER BY id",
+    }
+    results = {ownership: {} for ownership in ownerships}
+    filtered_counts = {ownership: 0 for ownership in ownerships}
+    for ownership in ownerships:
+        for name, pkgbase, version in conn.execute(queries[ownership], (maintainer,)):
+            pkg = {"Name": name, "Version": version}
+            if pkgbase is not None:
+                pkg["PackageBase"] = pkgbase
+            base_name, entry = _aur_entry_from_pkg(pkg, aur_logger)
+            filtered_counts[ownership] += 1
+            if base_name and base_name not in results[ownership]:
+                results[ownership][base_name] = entry
+    return results, filtered_counts
+
+
+def load_subset_snapshot(path, key, logger=DEFAULT_LOGGER):
+    """(results, filtered_counts) snapshotted under `key`, or None."""
+    try:
+        with open(path, "rb") as f:
+            data = marshal.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable snapshot '{path}': {e}")
+        return None
+    if (
+        not isinstance(data, dict)
+        or data.get("schema") != AUR_SUBSET_SNAPSHOT_SCHEMA_VERSION
+        or data.get("key") != key
+    ):
+        return None
+    return data["results"], data["filtered_counts"]
+
+
+def save_subset_snapshot(path, key, scanned, logger=DEFAULT_LOGGER):
+    """Atomically write the filtered subset of a dump (temp file + rename)."""
+    results, filtered_counts = scanned
+    payload = marshal.dumps(
+        {
+            "schema": AUR_SUBSET_SNAPSHOT_SCHEMA_VERSION,
+            "key": key,
+            "results": results,
+            "filtered_counts": filtered_counts,
+        }
+    )
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}."
+        )
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Failed to write snapshot '{path}': {e}")
+
+
+def _fetch_aur_data_file(
+    ownerships,
+    maintainer,
+    aur_logger,
+    max_retries,
+    retry_delay,
+    cache_path,
+    cache_ttl,
+    index_path=None,
+):
+    """
+    Internal function to fetch AUR data from metadata file, matching every
+    ownership predicate in a single streaming pass over the dump. Records are
+    filtered as they are decoded, so non-matching packages are dropped straight
+    away and filtering starts while the download is still running.
+
+    The dump is kept at cache_path. Within cache_ttl seconds of the last fetch
+    it is used as is; after that it is revalidated with a conditional request
+    and only downloaded again if the server has a newer one.
+
+    With index_path, the SQLite index is refreshed during the same pass and
+    answers the lookup directly while the cached dump is unchanged. The
+    filtered result itself is snapshotted next to the dump, keyed by the
+    dump's ETag/identity and the lookup, so warm runs only unmarshal it.
+    """
+    maintainer_lower = maintainer.lower()
+    index = open_aur_index(index_path, logger=aur_logger) if index_path else None
+    try:
+
+        def scan(byte_chunks, refresh=None):
+            results = {ownership: {} for ownership in ownerships}
+            filtered_counts = {ownership: 0 for ownership in ownerships}
+            total = 0
+            for pkg in iter_json_array(_gunzip_text_chunks(byte_chunks)):
+                total += 1
+                if not isinstance(pkg, dict):
+                    continue
+                if refresh is not None:
+                    refresh.add(pkg)
+                matched = _matching_ownerships(pkg, ownerships, maintainer_lower)
+                if not matched:
+                    continue
+
+                base_name, entry = _aur_entry_from_pkg(pkg, aur_logger)
+                for ownership in matched:
+                    filtered_counts[ownership] += 1
+                    if base_name and base_name not in results[ownership]:
+                        results[ownership][base_name] = entry
+            aur_logger.info(
+                f"Successfully scanned {total} total packages from AUR metadata file"
+            )
+            return results, filtered_counts
+
+        snapshot_path = cache_path + AUR_SUBSET_SNAPSHOT_SUFFIX
+
+        def snapshot_key():
+            return (
+                info.get("etag"),
+                _dump_identity(cache_path),
+                maintainer_lower,
+                tuple(sorted(ownerships)),
+            )
+
+        def scan_cached():
+            scanned = load_subset_snapshot(snapshot_path, snapshot_key(), aur_logger)
+            if scanned is not None:
+                aur_logger.info(f"Loaded filtered AUR data from '{snapshot_path}'.")
+                return scanned
+            if index is None:
+                scanned = scan(_iter_cached_metadata_bytes(cache_path))
+            elif aur_index_matches(index, cache_path):
+                aur_logger.info(f"Answering from AUR index '{index_path}'.")
+                scanned = query_aur_index(index, ownerships, maintainer, aur_logger)
+            else:
+                refresh = _AurIndexRefresh(index, aur_logger)
+                try:
+                    scanned = scan(_iter_cached_metadata_bytes(cache_path), refresh)
+                except BaseException:
+                    refresh.abort()
+                    raise
+                refresh.finish(cache_path)
+            save_subset_snapshot(snapshot_path, snapshot_key(), scanned, aur_logger)
+            return scanned
+
+        scanned = None
+        stream_errors = (
+            OSError,
+            EOFError,
+            zlib.error,
+            json.JSONDecodeError,
+            UnicodeDecodeError,
         )
 
-        for attempt in range(max_retries):
+        info_path = cache_path + AUR_METADATA_INFO_SUFFIX
+        info = load_state_file(info_path, logger=aur_logger)
+        if not os.path.exists(cache_path):
+            info = {}
+
+        def drop_cache(reason):
+            aur_logger.warning(
+                f"Error reading cache file '{cache_path}': {reason}. Re-downloading."
+            )
+            for path in (cache_path, info_path, snapshot_path):
+                try:
+                    os.remove(path)
+                    aur_logger.info(f"Removed bad cache file: {path}")
+                except OSError:
+                    pass
+            info.clear()
+
+        # A cache without its sidecar is of unknown age and is fetched again.
+        age = time.time() - info.get("fetched_at", 0)
+        if info and info.get("url") == AUR_METADATA_URL and 0 <= age < cache_ttl:
+            aur_logger.info(
+                f"Using cached metadata file '{cache_path}' ({int(age)}s old, TTL {cache_ttl}s)."
+            )
             try:
-                aur_logger.debug(f"File download attempt {attempt + 1}/{max_retries}")
-                process = subprocess.run(
-                    ["curl", "-s", "-L", url],
-                    capture_output=True,
-                    text=False,  # binary
-                    check=True,
-                    timeout=30,  # Reduced timeout
+                scanned = scan_cached()
+            except stream_errors as e:
+                drop_cache(e)
+        elif info.get("url") != AUR_METADATA_URL:
+            info = {}
+
+        # Download (or revalidate) if the cache was missing, stale or bad
+        if scanned is None:
+            if info:
+                aur_logger.info(
+                    f"Revalidating cached AUR metadata file: {AUR_METADATA_URL}"
                 )
-                if not process.stdout:
-                    raise RuntimeError("Empty response from server")
-
-                raw_gzipped_data = process.stdout
-                aur_logger.debug(
-                    f"Downloaded {len(raw_gzipped_data)} bytes of compressed data"
+            else:
+                aur_logger.info(
+                    f"Downloading AUR metadata file from: {AUR_METADATA_URL}"
                 )
 
-                # Cache it
+            for attempt in range(max_retries):
+                error = None
                 try:
-                    with open(CACHE_FILE_PATH, "wb") as f:
-                        f.write(raw_gzipped_data)
-                    aur_logger.info(f"Cached metadata file to '{CACHE_FILE_PATH}'.")
-                except Exception as e:
+                    aur_logger.debug(
+                        f"File download attempt {attempt + 1}/{max_retries}"
+                    )
+                    refresh = None
+                    download = _MetadataDownload(
+                        AUR_METADATA_URL,
+                        cache_path,
+                        aur_logger,
+                        etag=info.get("etag"),
+                        last_modified=info.get("last_modified"),
+                    )
+                    try:
+                        if download.not_modified():
+                            aur_logger.info(
+                                f"AUR metadata not modified since last fetch; using '{cache_path}'."
+                            )
+                            try:
+                                scanned = scan_cached()
+                            except stream_errors as e:
+                                drop_cache(e)
+                                continue  # retry unconditionally, not a server failure
+                            info["fetched_at"] = time.time()
+                        else:
+                            if index is not None:
+                                refresh = _AurIndexRefresh(index, aur_logger)
+                            scanned = scan(download, refresh)
+                            if download.commit():
+                                if refresh is not None:
+                                    refresh.finish(cache_path)
+                                info = {
+                                    "url": AUR_METADATA_URL,
+                                    "etag": download.etag,
+                                    "last_modified": download.last_modified,
+                                    "fetched_at": time.time(),
+                                }
+                                save_subset_snapshot(
+                                    snapshot_path, snapshot_key(), scanned, aur_logger
+                                )
+                    finally:
+                        if refresh is not None and not refresh.failed:
+                            refresh.abort()  # no-op once finished
+                        download.close()
+                    # Written after the dump is in place, so validators never
+                    # describe a newer file than the one on disk.
+                    if info:
+                        save_state_file(info_path, info, logger=aur_logger)
+                    break  # success
+
+                except (
+                    requests.RequestException,
+                    RuntimeError,
+                ) + stream_errors as e:
+                    error = e
                     aur_logger.warning(
-                        f"Failed to write cache file '{CACHE_FILE_PATH}': {e}"
+                        f"File download error on attempt {attempt + 1}/{max_retries}: {e}"
                     )
 
-                break  # success
+                if attempt < max_retries - 1:
+                    delay = backoff_delay(attempt, retry_delay, error)
+                    aur_logger.info(f"Retrying in {delay:.1f} seconds...")
+                    time.sleep(delay)
 
-            except (
-                subprocess.TimeoutExpired,
-                subprocess.CalledProcessError,
-                RuntimeError,
-            ) as e:
-                aur_logger.warning(
-                    f"File download error on attempt {attempt + 1}/{max_retries} "
-                    f"for '{ownership}' key '{maintainer}': {e}"
+            else:
+                aur_logger.error(f"All {max_retries} file download attempts failed")
+                raise RuntimeError(
+                    f"AUR file download failed after {max_retries} attempts"
                 )
+    finally:
+        if index is not None:
+            index.close()
 
-            if attempt < max_retries - 1:
-                delay = retry_delay * (2**attempt)
-                aur_logger.info(f"Retrying in {delay} seconds...")
-                time.sleep(delay)
+    results, filtered_counts = scanned
+    for ownership in ownerships:
+        aur_logger.info(
+            f"Found {filtered_counts[ownership]} packages for '{ownership}' key '{maintainer}'"
+        )
+        aur_logger.info(
+            f"Fetched info for {len(results[ownership])} unique PkgBase(s) from AUR metadata file "
+            f"for '{ownership}' key '{maintainer}'."
+        )
 
-        else:
-            aur_logger.error(
-                f"All {max_retries} file download attempts failed for '{ownership}' key '{maintainer}'"
+    return results
+
+
+def get_combined_aur_data(
+    maintainer,
+    data_source="rpc",
+    logger=DEFAULT_LOGGER,
+    cache_path=None,
+    cache_ttl=DEFAULT_AUR_CACHE_TTL,
+    index_path=None,
+    pkgnames=None,
+):
+    """Fetch and combine maintainer and co-maintainer AUR data.
+
+    Maintainer data is required. If it cannot be fetched, an exception is raised.
+    Co-maintainer data is optional and merged if available. Both come from a
+    single scan of the metadata dump in 'file' mode, or from the same batched
+    lookup of `pkgnames` in 'info' mode.
+    """
+    aur_logger = logger.getChild("aur")
+
+    try:
+        by_ownership = fetch_aur_data_multi(
+            ["maintainer", "comaintainers"],
+            maintainer,
+            data_source=data_source,
+            logger=logger,
+            optional=("comaintainers",),
+            cache_path=cache_path,
+            cache_ttl=cache_ttl,
+            index_path=index_path,
+            pkgnames=pkgnames,
+        )
+    except Exception as e:
+        aur_logger.error(
+            f"Failed to fetch required maintainer data for '{maintainer}': {e}"
+        )
+        # Abort early
+        raise
+
+    # Even an empty dict is a valid "no packages" result
+    maintainer_data = by_ownership["maintainer"]
+    aur_logger.info(
+        f"Fetched maintainer data for '{maintainer}' "
+        f"({len(maintainer_data)} packages)."
+    )
+    aur_data = dict(maintainer_data)
+
+    comaintainer_data = by_ownership.get("comaintainers")
+    if comaintainer_data:
+        aur_data.update(comaintainer_data)
+        aur_logger.info(
+            f"Successfully merged co-maintainer data for '{maintainer}' "
+            f"({len(comaintainer_data)} packages)."
+        )
+
+    return aur_data
+
+
+def load_state_file(path, logger=DEFAULT_LOGGER):
+    """Load a JSON state file from the cache dir, or {} if missing/unusable."""
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Ignoring unreadable state file '{path}': {e}")
+        return {}
+    if not isinstance(data, dict) or data.get("schema") != STATE_SCHEMA_VERSION:
+        logger.info(f"State file '{path}' has an old schema, ignoring it.")
+        return {}
+    return data
+
+
+def save_state_file(path, data, logger=DEFAULT_LOGGER):
+    """Atomically write a JSON state file (temp file + rename)."""
+    data = dict(data, schema=STATE_SCHEMA_VERSION)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}."
+        )
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Failed to write state file '{path}': {e}")
+
+
+def extractor_fingerprint(script_path):
+    """
+    Hash of pkgbuild_to_json.py and this module. Stored local state is only
+    reused under the same code, since either one decides what an entry holds.
+    """
+    digest = hashlib.sha256()
+    for path in (script_path, os.path.abspath(__file__)):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def load_extractor_state(path, fingerprint, logger=DEFAULT_LOGGER):
+    """load_state_file, discarding state written by other extractor code."""
+    data = load_state_file(path, logger)
+    if data and data.get("extractor") != fingerprint:
+        logger.info(
+            f"State file '{path}' was written by a different extractor or updater "
+            f"version, ignoring it."
+        )
+        return {}
+    return data
+
+
+def _local_entry_from_item(item, local_logger):
+    """Convert one pkgbuild_to_json.py item into (pkgbase, local data entry)."""
+    json_pkgbase, json_pkgname, pkgfile = (
+        item.get("pkgbase"),
+        item.get("pkgname"),
+        item.get("pkgfile"),
+    )
+    key_pkgbase = json_pkgbase
+    if not key_pkgbase and pkgfile:
+        key_pkgbase = os.path.basename(os.path.dirname(pkgfile))
+    if not key_pkgbase:
+        local_logger.warning(f"Cannot determine pkgbase for item: {item}. Skipping.")
+        return None, None
+    actual_name = json_pkgname or key_pkgbase
+
+    return key_pkgbase, {
+        "local_actual_pkgname": actual_name,
+        "local_pkgbase_derived": key_pkgbase,
+        "pkgver": item.get("pkgver"),
+        "pkgrel": item.get("pkgrel"),
+        "depends": item.get("depends", []),
+        "makedepends": item.get("makedepends", []),
+        "checkdepends": item.get("checkdepends", []),
+        "sources": item.get("sources", []),
+        "validpgpkeys": item.get("validpgpkeys", []),
+        "pkgfile": pkgfile,
+    }
+
+
+def _git(repo_dir, *args, logger=DEFAULT_LOGGER):
+    """Run a git command in repo_dir; returns stdout, or None on failure."""
+    # The checkout may be owned by another user than the one running us (CI runs
+    # this as 'builder'), so don't let safe.directory checks get in the way.
+    cmd = ["git", "-c", "safe.directory=*", "-C", repo_dir, *args]
+    try:
+        proc = subprocess.run(
+            cmd, capture_output=True, text=True, check=False, timeout=60
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.debug(f"git {' '.join(args)} failed: {e}")
+        return None
+    if proc.returncode != 0:
+        logger.debug(f"git {' '.join(args)} failed: {proc.stderr.strip()}")
+        return None
+    return proc.stdout
+
+
+def git_head_commit(repo_dir, logger=DEFAULT_LOGGER):
+    out = _git(repo_dir, "rev-parse", "HEAD", logger=logger)
+    return out.strip() if out else None
+
+
+def git_changed_paths(repo_dir, since_commit, logger=DEFAULT_LOGGER):
+    """
+    Paths under repo_dir (relative to it) that differ between since_commit and
+    the working tree, including untracked files. None if that cannot be told,
+    e.g. the commit is gone and cannot be fetched.
+    """
+    commit_ref = f"{since_commit}^{{commit}}"
+    if _git(repo_dir, "cat-file", "-e", commit_ref, logger=logger) is None:
+        # Shallow CI checkouts only have HEAD; fetch just the recorded commit.
+        logger.info(f"Fetching previously processed commit {since_commit[:12]}.")
+        _git(
+            repo_dir,
+            "fetch",
+            "--quiet",
+            "--depth=1",
+            "origin",
+            since_commit,
+            logger=logger,
+        )
+        if _git(repo_dir, "cat-file", "-e", commit_ref, logger=logger) is None:
+            return None
+    diff = _git(
+        repo_dir,
+        "diff",
+        "--name-only",
+        "--relative",
+        since_commit,
+        "--",
+        ".",
+        logger=logger,
+    )
+    untracked = _git(
+        repo_dir, "ls-files", "--others", "--exclude-standard", "--", ".", logger=logger
+    )
+    if diff is None or untracked is None:
+        return None
+    return [p for p in (diff + untracked).splitlines() if p]
+
+
+def reuse_unchanged_entries(
+    abs_path_root, pkg_files, local_state, logger=DEFAULT_LOGGER
+):
+    """
+    Split pkg_files into stored entries for package directories that git reports
+    unchanged since the recorded commit, and the PKGBUILDs that must be read.
+    Falls back to reading everything if the diff is unavailable or touches
+    files outside any package directory.
+    """
+    entries = local_state.get("entries", {})
+    since_commit = local_state.get("commit")
+    if not since_commit or local_state.get("root") != abs_path_root:
+        return {}, pkg_files
+    changed = git_changed_paths(abs_path_root, since_commit, logger)
+    if changed is None:
+        logger.info(
+            "Cannot diff against the last processed commit; reading all PKGBUILDs."
+        )
+        return {}, pkg_files
+
+    pkg_dirs = {
+        os.path.relpath(os.path.dirname(pkg_file), abs_path_root): pkg_file
+        for pkg_file in pkg_files
+    }
+    changed_dirs = set()
+    for path in changed:
+        parent = os.path.dirname(path)
+        while parent and parent not in pkg_dirs:
+            parent = os.path.dirname(parent)
+        if not parent:
+            if not os.path.lexists(os.path.join(abs_path_root, path)):
+                continue  # removed along with its package directory
+            logger.info(
+                f"'{path}' changed outside any package directory; reading all PKGBUILDs."
             )
-            raise RuntimeError(
-                f"AUR file download failed after {max_retries} attempts for "
-                f"'{ownership}' key '{maintainer}'"
+            return {}, pkg_files
+        changed_dirs.add(parent)
+
+    reused, remaining = {}, []
+    for rel_dir, pkg_file in pkg_dirs.items():
+        entry = entries.get(rel_dir)
+        if rel_dir in changed_dirs or not entry:
+            remaining.append(pkg_file)
+            continue
+        entry = dict(entry, pkgfile=pkg_file)
+        reused[entry["local_pkgbase_derived"]] = entry
+    logger.info(
+        f"{len(changed_dirs)} package dir(s) changed since {since_commit[:12]}; "
+        f"reusing {len(reused)} stored result(s), {len(remaining)} PKGBUILD(s) to read."
+    )
+    return reused, remaining
+
+
+# --- Package Discovery ---
+_discovery_cache = {}
+_discovery_lock = threading.Lock()
+
+
+def _walk_package_tree(root, ignored_dirs):
+    found = {name: [] for name in DISCOVERY_FILENAMES}
+    visited = pruned = 0
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        visited += 1
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        is_package = any(e.name == "PKGBUILD" for e in entries)
+        for entry in entries:
+            if entry.name in found:
+                if entry.is_file():
+                    found[entry.name].append(entry.path)
+            elif entry.is_dir(follow_symlinks=False):
+                if (
+                    entry.name.startswith(".")
+                    or entry.name in ignored_dirs
+                    or (is_package and entry.name in PACKAGE_BUILD_DIRS)
+                ):
+                    pruned += 1
+                else:
+                    stack.append(entry.path)
+    for paths in found.values():
+        paths.sort()
+    return found, visited, pruned
+
+
+def discover_package_files(
+    path_root, ignored_dirs=DEFAULT_IGNORED_DIRS, logger=DEFAULT_LOGGER
+):
+    """
+    PKGBUILD and .nvchecker.toml paths under path_root, keyed by file name,
+    from one os.scandir walk that prunes ignored directories. The result is
+    cached per (root, ignored_dirs), so every phase of a run shares one walk.
+    """
+    key = (os.path.abspath(path_root), tuple(sorted(ignored_dirs)))
+    with _discovery_lock:
+        if key not in _discovery_cache:
+            start = time.monotonic()
+            found, visited, pruned = _walk_package_tree(key[0], key[1])
+            logger.getChild("discovery").info(
+                f"Scanned {visited} directories under '{key[0]}' "
+                f"({pruned} pruned) in {time.monotonic() - start:.2f}s: "
+                f"{len(found['PKGBUILD'])} PKGBUILD(s), "
+                f"{len(found['.nvchecker.toml'])} .nvchecker.toml file(s)."
             )
+            _discovery_cache[key] = found
+        return _discovery_cache[key]
+
+
+def fetch_local_pkgbuild_data(
+    path_root,
+    pkgbuild_script_path,
+    manual_packages=None,
+    cache_dir=None,
+    logger=DEFAULT_LOGGER,
+    ignored_dirs=DEFAULT_IGNORED_DIRS,
+):
+    local_logger = logger.getChild("local")
+    local_data_by_pkgbase = {}
+    actual_script_path = os.path.abspath(pkgbuild_script_path)
+    if not os.path.exists(actual_script_path):
+        local_logger.critical(f"Script '{actual_script_path}' not found.")
+        return local_data_by_pkgbase
+    abs_path_root = os.path.abspath(path_root)
+    local_logger.info(f"Searching PKGBUILDs in '{abs_path_root}'")
+    pkg_files = list(
+        discover_package_files(abs_path_root, ignored_dirs, logger)["PKGBUILD"]
+    )
+
+    if manual_packages:
+        local_logger.info(f"Filtering PKGBUILDs for manual packages: {manual_packages}")
+        filtered_pkg_files = []
+        for pkg_file in pkg_files:
+            package_name = os.path.basename(os.path.dirname(pkg_file))
+            if package_name in manual_packages:
+                filtered_pkg_files.append(pkg_file)
+            else:
+                local_logger.debug(
+                    f"Ignoring PKGBUILD in '{pkg_file}' as '{package_name}' not in manual list."
+                )
+        pkg_files = filtered_pkg_files
+        local_logger.info(
+            f"Found {len(pkg_files)} PKGBUILD(s) after manual package filtering."
+        )
+
+    if not pkg_files:
+        local_logger.warning(f"No PKGBUILDs found in '{abs_path_root}'.")
+        return local_data_by_pkgbase
+    local_logger.info(f"Found {len(pkg_files)} PKGBUILD(s) to process.")
+
+    # Packages untouched since the last recorded commit reuse their stored entries.
+    local_state, local_state_path, head_commit = None, None, None
+    if cache_dir:
+        fingerprint = extractor_fingerprint(actual_script_path)
+        local_state_path = os.path.join(cache_dir, LOCAL_STATE_FILENAME)
+        local_state = load_extractor_state(local_state_path, fingerprint, local_logger)
+        head_commit = git_head_commit(abs_path_root, local_logger)
+        reused, pkg_files = reuse_unchanged_entries(
+            abs_path_root, pkg_files, local_state, local_logger
+        )
+        local_data_by_pkgbase.update(reused)
 
-    # At this point we must have raw_gzipped_data
+    complete = True
+    failed_pkgfiles = set()
+    if pkg_files:
+
+        def _on_item(item):
+            key_pkgbase, entry = _local_entry_from_item(item, local_logger)
+            if not key_pkgbase:
+                return False
+            local_data_by_pkgbase[key_pkgbase] = entry
+            if "error" in item:
+                failed_pkgfiles.add(item.get("pkgfile"))
+            return True
+
+        complete = _stream_pkgbuild_to_json(
+            actual_script_path, pkg_files, cache_dir, _on_item, local_logger
+        )
+
+    # Only a complete, unfiltered run may advance the recorded commit; otherwise
+    # packages that were not looked at would be marked as current.
+    # Directories with uncommitted changes are left out, as their stored result
+    # would not match HEAD once those changes are reverted.
+    dirty = None
+    if local_state is not None and head_commit and complete and not manual_packages:
+        dirty = git_changed_paths(abs_path_root, head_commit, local_logger)
+    if dirty is not None:
+        dirty_dirs = set()
+        for path in dirty:
+            while path:
+                path = os.path.dirname(path)
+                dirty_dirs.add(path)
+        entries = {}
+        for entry in local_data_by_pkgbase.values():
+            if not entry.get("pkgfile") or entry["pkgfile"] in failed_pkgfiles:
+                continue
+            rel_dir = os.path.relpath(os.path.dirname(entry["pkgfile"]), abs_path_root)
+            if rel_dir not in dirty_dirs:
+                entries[rel_dir] = entry
+        save_state_file(
+            local_state_path,
+            {
+                "root": abs_path_root,
+                "commit": head_commit,
+                "extractor": fingerprint,
+                "entries": entries,
+            },
+            local_logger,
+        )
+    return local_data_by_pkgbase
+
+
+def _stream_pkgbuild_to_json(
+    actual_script_path, pkg_files, cache_dir, on_item, local_logger
+):
+    """
+    Run pkgbuild_to_json.py over pkg_files, passing each NDJSON record to
+    on_item as it arrives. Returns False if the run timed out or failed.
+    """
+    cmd = [
+        sys.executable,
+        actual_script_path,
+        "--backend",
+        "coproc",
+        "--static",
+        "--ndjson",
+        "--files-from",
+        "-",
+        "-0",
+    ]
+    if cache_dir:
+        cmd.extend(["--cache-file", os.path.join(cache_dir, PKGBUILD_CACHE_FILENAME)])
+    if local_logger.isEnabledFor(logging.DEBUG):
+        cmd.append("--profile")
+    local_logger.debug(
+        f"Calling pkgbuild_to_json.py (cmd snippet): {' '.join(cmd[:3])} ..."
+    )
+
+    timed_out = threading.Event()
+    count = 0
     try:
-        decompressed_data = gzip.decompress(raw_gzipped_data)
-        aur_logger.debug(f"Decompressed to {len(decompressed_data)} bytes")
-
-        # Validate that the data looks like a JSON array
-        if not decompressed_data.strip().startswith(
-            b"["
-        ) or not decompressed_data.strip().endswith(b"]"):
-            raise json.JSONDecodeError(
-                "Invalid JSON array structure.",
-                decompressed_data.decode("utf-8", "ignore"),
-                0,
+        # stderr goes to a file so a chatty extractor can never block on a full pipe
+        # while we are reading stdout.
+        with tempfile.TemporaryFile(mode="w+") as stderr_file:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+                text=True,
+            )
+
+            # Paths go over stdin (NUL-separated) rather than argv, so the list
+            # is not bounded by ARG_MAX and extraction starts with the first path.
+            def _write_paths():
+                try:
+                    for pkg_file in pkg_files:
+                        proc.stdin.write(pkg_file + "\0")
+                except (BrokenPipeError, ValueError):
+                    pass
+                finally:
+                    try:
+                        proc.stdin.close()
+                    except BrokenPipeError:
+                        pass
+
+            writer = threading.Thread(target=_write_paths, daemon=True)
+            writer.start()
+
+            def _kill_on_timeout():
+                timed_out.set()
+                proc.kill()
+
+            timer = threading.Timer(LOCAL_EXTRACT_TIMEOUT, _kill_on_timeout)
+            timer.start()
+            try:
+                # One record per line, consumed as the extractor produces them.
+                for line in proc.stdout:
+                    if not line.strip():
+                        continue
+                    try:
+                        item = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        local_logger.error(
+                            f"Failed to parse JSON line from '{actual_script_path}': {e}\nData: {line[:500]}..."
+                        )
+                        continue
+                    if on_item(item):
+                        count += 1
+            finally:
+                timer.cancel()
+                proc.stdout.close()
+                returncode = proc.wait()
+                writer.join()
+
+            stderr_file.seek(0)
+            stderr_text = stderr_file.read().strip()
+
+        if timed_out.is_set():
+            local_logger.error(
+                f"Call to '{actual_script_path}' timed out after {LOCAL_EXTRACT_TIMEOUT}s; "
+                f"keeping {count} of {len(pkg_files)} result(s) received before the timeout."
+            )
+        elif returncode != 0:
+            local_logger.error(
+                f"Call to '{actual_script_path}' (command: \"{' '.join(cmd)}\") failed with return code {returncode}."
             )
+            if stderr_text:
+                local_logger.error(f"STDERR from failed call:\n{stderr_text}")
+            else:
+                local_logger.error("STDERR from failed call was empty.")
+        elif stderr_text:
+            # A clean run only reports (e.g. the static parser summary or
+            # --profile); anything logged at WARNING or above is a warning.
+            if re.search(r"^(WARNING|ERROR|CRITICAL):", stderr_text, re.M):
+                local_logger.warning(
+                    f"pkgbuild_to_json.py STDERR (though command exited 0):\n{stderr_text}"
+                )
+            else:
+                local_logger.info(f"pkgbuild_to_json.py STDERR:\n{stderr_text}")
 
-        data = json.loads(decompressed_data.decode("utf-8"))
-    except (gzip.BadGzipFile, json.JSONDecodeError, UnicodeDecodeError) as e:
-        aur_logger.error(f"Failed to process metadata file: {e}")
-        # If the data is bad, remove the cache file
-        if os.path.exists(CACHE_FILE_PATH):
-            os.remove(CACHE_FILE_PATH)
-            aur_logger.info(f"Removed bad cache file: {CACHE_FILE_PATH}")
-        raise RuntimeError(f"Failed to process metadata file: {e}")
+        if count == 0 and not timed_out.is_set() and returncode == 0:
+            local_logger.warning(
+                f'pkgbuild_to_json.py (command: "{" ".join(cmd)}") produced no records. No package data extracted.'
+            )
+        local_logger.info(f"Parsed local data for {count} unique PkgBase entries.")
+        return not timed_out.is_set() and returncode == 0
+    except Exception as e:
+        local_logger.error(
+            f"Local PKGBUILD fetch error: {e}",
+            exc_info=local_logger.isEnabledFor(logging.DEBUG),
+        )
+        return False
 
-    if not isinstance(data, list):
-        aur_logger.error(f"Expected JSON array, got {type(data).__name__}")
-        raise RuntimeError(f"Invalid metadata file format: {type(data).__name__}")
 
-    aur_logger.info(
-        f"Successfully loaded {len(data)} total packages from AUR metadata file"
+def local_package_names(local_data):
+    """AUR names to look up for local packages: each pkgbase and its pkgname."""
+    names = set()
+    for pkgbase, data in local_data.items():
+        names.add(pkgbase)
+        if data.get("local_actual_pkgname"):
+            names.add(data["local_actual_pkgname"])
+    return sorted(names)
+
+
+# --- Upstream Version Cache ---
+def nvchecker_cache_ttl_spec(value):
+    """argparse type for '[NAME=]SECONDS'; NAME is an entry or a source."""
+    key, sep, seconds = value.rpartition("=")
+    try:
+        ttl = int(seconds)
+    except ValueError:
+        ttl = -1
+    if ttl < 0 or (sep and not key):
+        raise argparse.ArgumentTypeError(
+            f"expected [NAME=]SECONDS with SECONDS >= 0, got '{value}'"
+        )
+    return (key or None, ttl)
+
+
+def nvchecker_config_blocks(toml_file, nv_logger):
+    """Entry name -> config block of a .nvchecker.toml, or None if unreadable."""
+    try:
+        with open(toml_file, "rb") as f:
+            config = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        nv_logger.warning(f"Cannot parse {toml_file} for the version cache: {e}")
+        return None
+    return {
+        name: block
+        for name, block in config.items()
+        if name != "__config__" and isinstance(block, dict)
+    }
+
+
+def nvchecker_config_hash(block):
+    return hashlib.sha256(
+        json.dumps(block, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def nvchecker_cache_ttl(name, block, ttls):
+    """TTL for an entry: per-entry, then per-source, then default; None = off."""
+    for key in (name, block.get("source"), None):
+        if key in ttls:
+            return ttls[key]
+    return None
+
+
+def _cached_nvchecker_result(name, entry, oldver_data):
+    """Replay a cached version the way nvchecker would have logged it."""
+    old_version = (oldver_data.get(name) or {}).get("version")
+    raw_log = {
+        "logger_name": "nvchecker.core",
+        "name": name,
+        "version": entry["version"],
+        "cached_at": entry["checked_at"],
+    }
+    if old_version and old_version == entry["version"]:
+        raw_log.update(event="up-to-date", level="debug")
+    else:
+        raw_log.update(
+            event="updated",
+            level="info",
+            old_version=old_version,
+            url=entry.get("url"),
+        )
+    return {
+        "nvchecker_name_reported": name,
+        "nvchecker_pkgver": entry["version"],
+        "nvchecker_event": raw_log["event"],
+        "nvchecker_raw_log": raw_log,
+    }
+
+
+def nvchecker_check_interval(entry, now):
+    """
+    Seconds until an entry is due again, from its upstream release history.
+
+    The expected release gap is the median of past gaps, counting the time
+    since the last release (or since tracking began) as an open gap, so
+    dormant projects drift towards NVCHECKER_SCHEDULE_MAX_INTERVAL while
+    frequently releasing ones stay due every run.
+    """
+    changes = entry.get("changes", [])
+    marks = [entry.get("since", now)] if not changes else changes
+    gaps = sorted(
+        [later - earlier for earlier, later in zip(marks, marks[1:])]
+        + [now - marks[-1]]
+    )
+    interval = min(
+        gaps[len(gaps) // 2] * NVCHECKER_SCHEDULE_FRACTION,
+        NVCHECKER_SCHEDULE_MAX_INTERVAL,
+    )
+    return interval * random.uniform(
+        1 - NVCHECKER_SCHEDULE_JITTER, 1 + NVCHECKER_SCHEDULE_JITTER
     )
 
-    # Filter by ownership / maintainer
-    count = 0
-    filtered_count = 0
 
-    for pkg in data:
-        if not isinstance(pkg, dict):
+def partition_by_version_cache(
+    toml_files,
+    cache_entries,
+    ttls,
+    oldver_data,
+    force_refresh,
+    nv_logger,
+    schedule=False,
+    max_checks=0,
+):
+    """
+    Split toml_files into those nvchecker must check and replayed results.
+
+    A file is skipped only when every entry in it has a cache entry for its
+    current config block that is within its TTL or, with schedule, not yet due.
+    With max_checks, the most overdue files are checked and the rest deferred
+    to a later run, replaying whatever is cached for them. force_refresh
+    checks everything. Returns (files_to_check, pending, cached_results) where
+    pending maps each cacheable entry being checked to its config hash.
+    """
+    now = time.time()
+    to_check, pending, cached_results = [], {}, {}
+    file_entries, due_at = {}, {}
+    # A capped run tracks every entry, so deferred ones can be replayed
+    track_all = schedule or max_checks
+    for toml_file in toml_files:
+        blocks = nvchecker_config_blocks(toml_file, nv_logger)
+        if not blocks:
+            to_check.append(toml_file)
+            due_at[toml_file] = 0
             continue
+        fresh, known = {}, {}
+        for name, block in blocks.items():
+            ttl = nvchecker_cache_ttl(name, block, ttls)
+            if ttl is None and not track_all:
+                continue
+            config_hash = nvchecker_config_hash(block)
+            pending[name] = config_hash
+            entry = cache_entries.get(name)
+            if not entry or entry.get("hash") != config_hash:
+                continue
+            known[name] = entry
+            if not force_refresh and (
+                (ttl is not None and now - entry.get("checked_at", 0) < ttl)
+                or (schedule and entry.get("next_check", 0) > now)
+            ):
+                fresh[name] = entry
+        if len(fresh) < len(blocks):
+            to_check.append(toml_file)
+            file_entries[toml_file] = blocks, known
+            # Unknown entries first, then the longest overdue
+            due_at[toml_file] = min(
+                (
+                    known[name].get("next_check", 0) if name in known else 0
+                    for name in blocks
+                ),
+                default=0,
+            )
+            continue
+        for name, entry in fresh.items():
+            del pending[name]
+            cached_results[name] = _cached_nvchecker_result(name, entry, oldver_data)
+    skipped = len(toml_files) - len(to_check)
+
+    deferred = []
+    if max_checks and not force_refresh and len(to_check) > max_checks:
+        to_check.sort(key=lambda toml_file: due_at[toml_file])
+        to_check, deferred = to_check[:max_checks], to_check[max_checks:]
+        for toml_file in deferred:
+            blocks, known = file_entries.get(toml_file, ({}, {}))
+            for name in blocks:
+                pending.pop(name, None)
+            for name, entry in known.items():
+                cached_results[name] = _cached_nvchecker_result(
+                    name, entry, oldver_data
+                )
+    nv_logger.info(
+        f"Version cache: {skipped} of {len(toml_files)} .nvchecker.toml file(s) "
+        f"fresh or not due, {len(deferred)} deferred by the per-run cap, "
+        f"{len(cached_results)} cached result(s)"
+        f"{' (refresh forced)' if force_refresh else ''}."
+    )
+    return to_check, pending, cached_results
+
 
-        match = False
-        if ownership == "maintainer":
-            pkg_owner = pkg.get("Maintainer")
-            if pkg_owner and pkg_owner.lower() == maintainer.lower():
-                match = True
-        elif ownership == "comaintainers":
-            pkg_co_owners = pkg.get("CoMaintainers")
-            if isinstance(pkg_co_owners, list):
-                if any(co.lower() == maintainer.lower() for co in pkg_co_owners):
-                    match = True
-
-        if not match:
+def update_version_cache(cache_entries, pending, versions, schedule=False):
+    """
+    Record newly checked versions and when each upstream version changed.
+
+    Failed checks keep their old entry. With schedule, also set when each
+    entry is next due from its release history.
+    """
+    now = time.time()
+    for name, config_hash in pending.items():
+        result = versions.get(name)
+        if not result or not result.get("version"):
             continue
+        previous = cache_entries.get(name) or {}
+        changes = previous.get("changes", [])
+        if previous.get("version") and previous["version"] != result["version"]:
+            changes = (changes + [now])[-NVCHECKER_HISTORY_LENGTH:]
+        entry = cache_entries[name] = {
+            "hash": config_hash,
+            "version": result["version"],
+            "url": result.get("url"),
+            "checked_at": now,
+            "since": previous.get("since", now),
+            "changes": changes,
+        }
+        if schedule:
+            entry["next_check"] = now + nvchecker_check_interval(entry, now)
 
-        filtered_count += 1
-        name = pkg.get("Name")
-        base_name = pkg.get("PackageBase", name)
-        full_ver = pkg.get("Version")
 
-        if not all([name, base_name, full_ver]):
-            aur_logger.warning(
-                f"Skipping package with missing required fields: "
-                f"Name={name}, PackageBase={base_name}, Version={full_ver}"
+# --- GitHub Token Pool ---
+class GitHubQuotaDeferred(Exception):
+    """Raised instead of a GitHub request once every pooled token is at its reserve."""
+
+
+def read_nvchecker_keys(key_file, nv_logger):
+    """The [keys] table of an nvchecker key file, or {} if unreadable."""
+    try:
+        with open(key_file, "rb") as f:
+            keys = tomllib.load(f).get("keys", {})
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        nv_logger.error(f"Cannot read key file '{key_file}': {e}")
+        return {}
+    return keys if isinstance(keys, dict) else {}
+
+
+def github_pool_tokens(keys, environ):
+    """Distinct GitHub tokens from the key file and environment, in order."""
+    tokens = [keys.get("github.com"), keys.get("github")]
+    pool = keys.get("github_pool", [])
+    tokens.extend(pool if isinstance(pool, list) else [pool])
+    tokens.append(environ.get("GITHUB_TOKEN"))
+    tokens.extend(re.split(r"[\s,]+", environ.get("GITHUB_TOKENS", "")))
+    return list(dict.fromkeys(t for t in tokens if isinstance(t, str) and t))
+
+
+def write_nvchecker_keyfile(path, keys, github_token=None):
+    """Write an nvchecker key file with keys, using github_token for GitHub."""
+    keys = {k: v for k, v in keys.items() if isinstance(v, str)}
+    if github_token:
+        # nvchecker looks up 'github.com' before the legacy 'github' key
+        keys["github.com"] = keys["github"] = github_token
+    with open(path, "w") as f:
+        f.write("[keys]\n")
+        for key, value in keys.items():
+            f.write(f"{json.dumps(key)} = {json.dumps(value)}\n")
+    return path
+
+
+class GitHubTokenPool:
+    """
+    GitHub API tokens shared by every request nvchecker sends to GitHub.
+
+    Each request goes out with the token that has the most quota left for its
+    rate-limit resource, as reported by the X-RateLimit headers of the
+    responses so far (seeded from /rate_limit, which costs no quota). Once
+    every token is down to its reserve, requests raise GitHubQuotaDeferred
+    and their checks are left to a later run.
+    """
+
+    def __init__(self, tokens, logger):
+        self.tokens = list(tokens)
+        self.logger = logger
+        self.remaining = {}  # (token, resource) -> requests left
+        self.reset = {}  # (token, resource) -> epoch seconds of the next reset
+        self.rejected = set()
+
+    @staticmethod
+    def label(token):
+        return f"...{token[-4:]}"
+
+    def to_json(self):
+        """The pool's tokens and quota, for a shard process's from_json."""
+        return json.dumps(
+            {
+                "tokens": self.tokens,
+                "rejected": sorted(self.rejected),
+                "quota": [
+                    [token, resource, left, self.reset.get((token, resource), 0)]
+                    for (token, resource), left in self.remaining.items()
+                ],
+            }
+        )
+
+    @classmethod
+    def from_json(cls, data, logger):
+        data = json.loads(data)
+        pool = cls(data["tokens"], logger)
+        pool.rejected.update(data["rejected"])
+        for token, resource, left, reset in data["quota"]:
+            pool.remaining[token, resource] = left
+            pool.reset[token, resource] = reset
+        return pool
+
+    def refresh(self):
+        """Read every token's quota from GitHub's /rate_limit endpoint."""
+        client = get_http_client()
+        for token in self.tokens:
+            if token in self.rejected:
+                continue
+            try:
+                response = client.get(
+                    GITHUB_RATE_LIMIT_URL,
+                    headers={
+                        "Authorization": f"Bearer {token}",
+                        "Accept": "application/vnd.github+json",
+                    },
+                )
+                if response.status_code == 401:
+                    self.update(token, None, 401, {})
+                    continue
+                response.raise_for_status()
+                resources = response.json()["resources"]
+                for name in GITHUB_RATE_LIMIT_RESOURCES:
+                    if name in resources:
+                        self.remaining[token, name] = resources[name]["remaining"]
+                        self.reset[token, name] = resources[name]["reset"]
+            except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+                self.logger.warning(
+                    f"Cannot read GitHub quota for token {self.label(token)}: {e}"
+                )
+        self.logger.info(
+            f"GitHub token pool: "
+            + ", ".join(
+                f"{self.label(t)} "
+                + (
+                    "rejected"
+                    if t in self.rejected
+                    else "/".join(
+                        f"{'?' if self.left(t, r) is None else self.left(t, r)} {r}"
+                        for r in GITHUB_RATE_LIMIT_RESOURCES
+                    )
+                )
+                for t in self.tokens
+            )
+        )
+
+    def left(self, token, resource):
+        """Requests token has left for resource; None if unknown or reset since."""
+        key = (token, resource)
+        if key not in self.remaining or self.reset.get(key, 0) <= time.time():
+            return None
+        return self.remaining[key]
+
+    def ranked(self, resource="core"):
+        """Usable tokens, most quota left first; unknown quota ranks last."""
+        return sorted(
+            (t for t in self.tokens if t not in self.rejected),
+            key=lambda t: -(self.left(t, resource) or GITHUB_TOKEN_RESERVE + 1),
+        )
+
+    def acquire(self, resource):
+        """The token to send the next request for resource with."""
+        ranked = self.ranked(resource)
+        if not ranked:
+            raise GitHubQuotaDeferred("no usable GitHub token")
+        token = ranked[0]
+        left = self.left(token, resource)
+        if left is not None:
+            if left <= GITHUB_TOKEN_RESERVE:
+                raise GitHubQuotaDeferred(
+                    f"every GitHub token is at its reserve of "
+                    f"{GITHUB_TOKEN_RESERVE} {resource} requests"
+                )
+            # Count the request now, so concurrent ones spread over the pool
+            self.remaining[token, resource] = left - 1
+        return token
+
+    def update(self, token, resource, status, headers):
+        """Record the quota a GitHub response reported for token."""
+        if status == 401:
+            if token not in self.rejected:
+                self.logger.warning(
+                    f"GitHub token {self.label(token)} was rejected; not using it."
+                )
+                self.rejected.add(token)
+            return
+        try:
+            left = int(headers["X-RateLimit-Remaining"])
+            reset = int(headers["X-RateLimit-Reset"])
+        except (KeyError, TypeError, ValueError):
+            return
+        key = (token, headers.get("X-RateLimit-Resource") or resource)
+        # Responses to concurrent requests arrive out of order
+        if self.reset.get(key) == reset:
+            left = min(left, self.remaining[key])
+        self.remaining[key] = left
+        self.reset[key] = reset
+
+
+def install_github_token_pool(pool, nv_httpclient):
+    """
+    Route the GitHub API requests of nvchecker's HTTP session through pool.
+
+    Must follow nvchecker's setup_httpclient. Only requests authorised with
+    one of the pool's tokens are rerouted; the auth scheme is kept.
+    """
+    session = nv_httpclient.session._obj
+    send = functools.partial(type(session).request_impl, session)
+
+    async def request_impl(url, *, headers, **kwargs):
+        scheme, _, token = headers.get("Authorization", "").partition(" ")
+        parts = urlsplit(url)
+        if parts.hostname != GITHUB_API_HOST or token not in pool.tokens:
+            return await send(url, headers=headers, **kwargs)
+        resource = "graphql" if parts.path.rstrip("/").endswith("/graphql") else "core"
+        token = pool.acquire(resource)
+        headers = {**headers, "Authorization": f"{scheme} {token}"}
+        try:
+            response = await send(url, headers=headers, **kwargs)
+        except nv_httpclient.HTTPError as e:
+            pool.update(
+                token, resource, e.code, getattr(e.response, "headers", None) or {}
             )
-            continue
+            raise
+        pool.update(token, resource, 200, response.headers)
+        return response
 
-        ver_no_epoch = full_ver.split(":", 1)[-1]
-        parts = ver_no_epoch.rsplit("-", 1)
-        base_v = parts[0]
-        rel_v = parts[1] if len(parts) > 1 and parts[1].isdigit() else "0"
+    session.request_impl = request_impl
 
-        if base_name not in aur_data_by_pkgbase:
-            count += 1
-            aur_data_by_pkgbase[base_name] = {
-                "aur_actual_pkgname": name,
-                "aur_pkgbase_reported": base_name,
-                "aur_pkgver": base_v,
-                "aur_pkgrel": rel_v,
-            }
 
-    aur_logger.info(
-        f"Found {filtered_count} packages for '{ownership}' key '{maintainer}'"
-    )
-    aur_logger.info(
-        f"Fetched info for {count} unique PkgBase(s) from AUR metadata file for '{maintainer}'."
+def nvchecker_pool_main():
+    """
+    The nvchecker command, with GitHub requests routed through the token pool
+    passed in NVCHECKER_POOL_ENV. Shard processes run this.
+    """
+    from nvchecker import (
+        __main__ as nv_main,
+        core as nv_core,
+        httpclient as nv_httpclient,
     )
 
-    return aur_data_by_pkgbase
-
+    pool = GitHubTokenPool.from_json(
+        os.environ.pop(NVCHECKER_POOL_ENV), DEFAULT_LOGGER.getChild("nvchecker")
+    )
+    setup_httpclient = nv_core.setup_httpclient
+
+    def setup_pooled_httpclient(*args, **kwargs):
+        dispatcher = setup_httpclient(*args, **kwargs)
+        install_github_token_pool(pool, nv_httpclient)
+        return dispatcher
+
+    nv_core.setup_httpclient = setup_pooled_httpclient
+    sys.argv[0] = "nvchecker"
+    nv_main.main()
+
+
+def nvchecker_shard_count(num_files, seconds_per_package=None):
+    """Shards for num_files configs: CPU count, or more if latency demands."""
+    shards = os.cpu_count() or 1
+    if seconds_per_package:
+        budget = NVCHECKER_SHARD_TIMEOUT * NVCHECKER_SHARD_BUDGET
+        shards = max(shards, math.ceil(num_files * seconds_per_package / budget))
+    return max(1, min(shards, NVCHECKER_MAX_SHARDS, num_files))
+
+
+def _record_nvchecker_log(entry, results_by_pkgbase, nv_logger):
+    """Fold one nvchecker log record into results_by_pkgbase."""
+    if entry.get("logger_name") != "nvchecker.core":
+        nv_logger.debug(f"Skipping NVCR log: {str(entry)[:100]}...")
+        return
+    name = entry.get("name")  # This is the pkgbase
+    if not name:
+        nv_logger.warning(f"NVCR JSON line missing 'name': {entry}")
+        return
+    error = str(entry.get("error") or entry.get("exception") or "")
+    if GitHubQuotaDeferred.__name__ in error:
+        results_by_pkgbase[name] = {
+            "nvchecker_name_reported": name,
+            "nvchecker_pkgver": None,
+            "nvchecker_event": "deferred",
+            "nvchecker_raw_log": entry,
+        }
+        nv_logger.debug(f"NVCR: {name} deferred, GitHub quota is at its reserve.")
+        return
+    results_by_pkgbase[name] = {
+        "nvchecker_name_reported": name,
+        "nvchecker_pkgver": entry.get("version"),
+        "nvchecker_event": entry.get("event"),
+        "nvchecker_raw_log": entry,
+    }
+    ev, v, ov, lvl, msg = (
+        entry.get("event"),
+        entry.get("version", "N/A"),
+        entry.get("old_version", "N/A"),
+        entry.get("level"),
+        entry.get("msg", ""),
+    )
+    if ev == "updated":
+        nv_logger.info(f"NVCR: {name} UPDATED {ov} -> {v}")
+    # elif ev == "up-to-date":
+    #    nv_logger.info(f"NVCR: {name} UP-TO-DATE at {v}")
+    elif ev == "no-result":
+        nv_logger.warning(f"NVCR: {name} NO-RESULT. {msg}")
+    elif lvl == "error" or entry.get("exc_info"):
+        nv_logger.warning(f"NVCR: {name} ERROR - {entry.get('exc_info', msg)}")
+
+
+def _parse_nvchecker_output(stdout_data, nv_logger):
+    """Map nvchecker's JSON log lines to result entries keyed by pkgbase."""
+    results_by_pkgbase = {}
+    for line in stdout_data.strip().split("\n"):
+        if not line.strip():
+            continue
+        try:
+            _record_nvchecker_log(json.loads(line), results_by_pkgbase, nv_logger)
+        except json.JSONDecodeError:
+            nv_logger.warning(f"Failed to parse NVCR JSON: {line}")
+    return results_by_pkgbase
 
-def get_combined_aur_data(maintainer, data_source="rpc", logger=DEFAULT_LOGGER):
-    """Fetch and combine maintainer and co-maintainer AUR data.
 
-    Maintainer data is required. If it cannot be fetched, an exception is raised.
-    Co-maintainer data is optional and merged if available.
+def _run_nvchecker_inprocess(
+    toml_files, oldver_data, key_file, shards, github_pool, nv_logger
+):
     """
-    aur_logger = logger.getChild("aur")
+    Check toml_files through nvchecker's core API in this process.
 
-    # --- Required: maintainer data ---
+    Log records are collected as they are emitted instead of being parsed back
+    from stdout; GitHub requests go through github_pool if given. Returns (results, seconds, versions) like a shard, or None if
+    nvchecker cannot run in-process and the command should be used instead.
+    """
     try:
-        maintainer_data = fetch_aur_data(
-            "maintainer", maintainer, data_source=data_source, logger=logger
-        )
-        # Even an empty dict is a valid "no packages" result
-        aur_logger.info(
-            f"Fetched maintainer data for '{maintainer}' "
-            f"({len(maintainer_data)} packages)."
-        )
-    except Exception as e:
-        aur_logger.error(
-            f"Failed to fetch required maintainer data for '{maintainer}': {e}"
-        )
-        # Abort early
-        raise
-
-    aur_data = dict(maintainer_data)
+        import structlog
+        from pathlib import Path
+        from nvchecker import core as nv_core, httpclient as nv_httpclient, slogconf
+        from nvchecker.util import EntryWaiter, KeyManager, RichResult
+    except ImportError as e:
+        nv_logger.warning(f"nvchecker module not available ({e}); using the command.")
+        return None
 
-    # --- Optional: co-maintainer data ---
-    try:
-        comaintainer_data = fetch_aur_data(
-            "comaintainers", maintainer, data_source=data_source, logger=logger
+    entries = {}
+    for toml_file in toml_files:
+        blocks = nvchecker_config_blocks(toml_file, nv_logger)
+        if blocks is not None:
+            entries.update(blocks)
+    results = {}
+
+    def collect(logger, level, event):
+        event["level"] = level
+        # Same shape as a --logger=json line (exceptions become strings)
+        event = json.loads(json.dumps(event, default=repr, ensure_ascii=False))
+        _record_nvchecker_log(event, results, nv_logger)
+        raise structlog.DropEvent
+
+    async def check(keymanager):
+        oldvers = {
+            name: RichResult(version=d["version"]) for name, d in oldver_data.items()
+        }
+        entry_waiter = EntryWaiter()
+        result_q = asyncio.Queue()
+        dispatcher = nv_core.setup_httpclient(NVCHECKER_MAX_CONCURRENCY * shards)
+        if github_pool:
+            install_github_token_pool(github_pool, nv_httpclient)
+        futures = dispatcher.dispatch(
+            entries,
+            asyncio.Semaphore(NVCHECKER_MAX_CONCURRENCY * shards),
+            result_q,
+            keymanager,
+            entry_waiter,
+            1,
+            {},
         )
-        if comaintainer_data:
-            aur_data.update(comaintainer_data)
-            aur_logger.info(
-                f"Successfully merged co-maintainer data for '{maintainer}' "
-                f"({len(comaintainer_data)} packages)."
+        result_fu = asyncio.create_task(
+            nv_core.process_result(oldvers, result_q, entry_waiter)
+        )
+        try:
+            await asyncio.wait_for(nv_core.run_tasks(futures), NVCHECKER_SHARD_TIMEOUT)
+        except asyncio.TimeoutError:
+            nv_logger.error(
+                f"In-process NVChecker timed out after {NVCHECKER_SHARD_TIMEOUT}s; "
+                f"keeping the results so far."
             )
+        finally:
+            result_fu.cancel()
+            checked, _ = await result_fu
+            # Failed entries leave exceptions for dependent entries to await;
+            # nothing else will, so mark them retrieved to keep asyncio quiet.
+            for waiter in getattr(entry_waiter, "_waiting", {}).values():
+                if waiter.done() and not waiter.cancelled():
+                    waiter.exception()
+            session = getattr(nv_httpclient.session, "session", None)
+            close = getattr(session, "close", None)
+            if close and asyncio.iscoroutine(closing := close()):
+                await closing
+        return checked
+
+    nv_logger.info(
+        f"Running NVChecker in-process ({len(entries)} entries from "
+        f"{len(toml_files)} file(s))."
+    )
+    structlog.configure(
+        processors=[
+            slogconf.exc_info,
+            slogconf.filter_exc,
+            slogconf.filter_nones,
+            slogconf.filter_taskname,
+            structlog.processors.format_exc_info,
+            collect,
+        ],
+    )
+    start = time.monotonic()
+    try:
+        keymanager = KeyManager(Path(key_file) if key_file else None)
+        checked = asyncio.run(check(keymanager))
     except Exception as e:
-        aur_logger.warning(
-            f"Could not fetch co-maintainer data for '{maintainer}', proceeding without it: {e}"
+        nv_logger.warning(
+            f"In-process NVChecker failed ({e}); using the command.", exc_info=True
         )
-        # Do not re-raise, just warn and continue
-
-    return aur_data
-
-
-def fetch_local_pkgbuild_data(
-    path_root, pkgbuild_script_path, manual_packages=None, logger=DEFAULT_LOGGER
-):
-    local_logger = logger.getChild("local")
-    local_data_by_pkgbase = {}
-    actual_script_path = os.path.abspath(pkgbuild_script_path)
-    if not os.path.exists(actual_script_path):
-        local_logger.critical(f"Script '{actual_script_path}' not found.")
-        return local_data_by_pkgbase
-    abs_path_root = os.path.abspath(path_root)
-    pkgbuild_glob = os.path.join(abs_path_root, "**", "PKGBUILD")
-    local_logger.info(
-        f"Searching PKGBUILDs in '{abs_path_root}' using '{pkgbuild_glob}'"
+        return None
+    elapsed = time.monotonic() - start
+    versions = {
+        name: {"version": r.version, "url": r.url} for name, r in checked.items()
+    }
+    nv_logger.info(
+        f"In-process NVChecker reported {len(results)} package(s) in {elapsed:.1f}s."
     )
-    pkg_files = glob.glob(pkgbuild_glob, recursive=True)
+    return results, elapsed, versions
+
+
+def _run_nvchecker_shard(
+    shard_dir,
+    label,
+    toml_files,
+    abs_path_root,
+    oldver_data,
+    key_file,
+    nv_logger,
+    command=("nvchecker",),
+    env=None,
+):
+    """
+    Run one nvchecker process; returns (results, seconds, newver versions).
 
-    if manual_packages:
-        local_logger.info(f"Filtering PKGBUILDs for manual packages: {manual_packages}")
-        filtered_pkg_files = []
-        for pkg_file in pkg_files:
-            package_name = os.path.basename(os.path.dirname(pkg_file))
-            if package_name in manual_packages:
-                filtered_pkg_files.append(pkg_file)
-            else:
-                local_logger.debug(
-                    f"Ignoring PKGBUILD in '{pkg_file}' as '{package_name}' not in manual list."
+    command runs nvchecker (with its arguments appended) under env.
+    """
+    os.makedirs(shard_dir)
+    all_nv_tomls_path, oldver_json_path, newver_json_path = (
+        os.path.join(shard_dir, f)
+        for f in ["all_nv.toml", "oldver.json", "newver.json"]
+    )
+    content = [
+        "[__config__]\n",
+        f"oldver = '{os.path.basename(oldver_json_path)}'\n",
+        f"newver = '{os.path.basename(newver_json_path)}'\n\n",
+    ]
+    for tf in toml_files:
+        try:
+            with open(tf, "r") as f:
+                content.extend(
+                    [
+                        f"# Source: {os.path.relpath(tf, abs_path_root)}\n",
+                        f.read(),
+                        "\n\n",
+                    ]
                 )
-        pkg_files = filtered_pkg_files
-        local_logger.info(
-            f"Found {len(pkg_files)} PKGBUILD(s) after manual package filtering."
+        except Exception as e:
+            nv_logger.error(f"Error reading {tf}: {e}")
+            continue
+    with open(all_nv_tomls_path, "w") as f:
+        f.write("".join(content))
+    if nv_logger.isEnabledFor(logging.DEBUG):
+        nv_logger.debug(
+            f"Concatenated .nvchecker.toml for {label} (first 500c):\n{''.join(content)[:500]}..."
         )
+    with open(oldver_json_path, "w") as f:
+        json.dump({"version": 2, "data": oldver_data}, f)
+    with open(newver_json_path, "w") as f:
+        json.dump({}, f)
 
-    if not pkg_files:
-        local_logger.warning(f"No PKGBUILDs found in '{abs_path_root}'.")
-        return local_data_by_pkgbase
-    local_logger.info(f"Found {len(pkg_files)} PKGBUILD(s) to process.")
+    cmd = [*command, "-c", os.path.basename(all_nv_tomls_path), "--logger=json"]
+    if key_file:
+        cmd.extend(["-k", key_file])
 
-    cmd = [sys.executable, actual_script_path] + pkg_files
-    local_logger.debug(
-        f"Calling pkgbuild_to_json.py (cmd snippet): {' '.join(cmd[:3])} ..."
+    nv_logger.info(
+        f'Running NVChecker {label} ({len(toml_files)} file(s)): "{" ".join(cmd)}" (in {shard_dir})'
     )
-
+    # nvchecker is Python: unbuffered, it writes each JSON line as it logs it,
+    # so a shard killed on timeout still hands back the results it reported
+    env = {**(os.environ if env is None else env), "PYTHONUNBUFFERED": "1"}
+    start = time.monotonic()
+    stdout_data = ""
     try:
         proc = subprocess.run(
-            cmd, capture_output=True, text=True, check=False, timeout=100
+            cmd,
+            capture_output=True,
+            text=True,
+            cwd=shard_dir,
+            env=env,
+            check=False,
+            timeout=NVCHECKER_SHARD_TIMEOUT,
         )
-
-        if proc.returncode != 0:
-            # Enhanced logging for failure
-            local_logger.error(
-                f"Call to '{actual_script_path}' (command: \"{' '.join(cmd)}\") failed with return code {proc.returncode}."
-            )
-            if proc.stdout and proc.stdout.strip():
-                local_logger.error(f"STDOUT from failed call:\n{proc.stdout.strip()}")
-            else:
-                local_logger.error("STDOUT from failed call was empty.")
-            if proc.stderr and proc.stderr.strip():
-                local_logger.error(f"STDERR from failed call:\n{proc.stderr.strip()}")
-            else:
-                local_logger.error("STDERR from failed call was empty.")
-            return local_data_by_pkgbase  # Exit this function
-
-        # Existing stderr warning (if return code was 0 but there's stderr)
-        if proc.stderr and proc.stderr.strip():
-            local_logger.warning(
-                f"pkgbuild_to_json.py STDERR (though command exited 0):\n{proc.stderr.strip()}"
-            )
-
-        res_json = proc.stdout
-        if not res_json.strip():
-            local_logger.warning(
-                f'pkgbuild_to_json.py (command: "{" ".join(cmd)}") produced no STDOUT. Cannot parse local package data.'
-            )
-            return local_data_by_pkgbase
-
-        parsed_items = json.loads(res_json)
-        if not parsed_items:  # Check if the JSON parsed to an empty list/dict
-            local_logger.warning(
-                f'pkgbuild_to_json.py (command: "{" ".join(cmd)}") produced valid but empty JSON. No package data extracted.'
+        stdout_data, stderr_data, code = proc.stdout, proc.stderr, proc.returncode
+        if code != 0:
+            nv_logger.error(f"NVChecker {label} exited with code {code}.")
+        if stderr_data:
+            nv_logger.warning(f"NVChecker {label} STDERR:\n{stderr_data.strip()}")
+        if not stdout_data.strip() and code == 0:
+            nv_logger.info(
+                f"NVChecker {label} ran successfully, no JSON output on STDOUT."
             )
-            return local_data_by_pkgbase
-
-        parsed_items = json.loads(res_json)
-        count = 0
-        for item in parsed_items:
-            json_pkgbase, json_pkgname, pkgfile = (
-                item.get("pkgbase"),
-                item.get("pkgname"),
-                item.get("pkgfile"),
-            )
-            key_pkgbase = json_pkgbase
-            if not key_pkgbase and pkgfile:
-                key_pkgbase = os.path.basename(os.path.dirname(pkgfile))
-            if not key_pkgbase:
-                local_logger.warning(
-                    f"Cannot determine pkgbase for item: {item}. Skipping."
-                )
-                continue
-            actual_name = json_pkgname or key_pkgbase
-
-            local_data_by_pkgbase[key_pkgbase] = {
-                "local_actual_pkgname": actual_name,
-                "local_pkgbase_derived": key_pkgbase,
-                "pkgver": item.get("pkgver"),
-                "pkgrel": item.get("pkgrel"),
-                "depends": item.get("depends", []),
-                "makedepends": item.get("makedepends", []),
-                "checkdepends": item.get("checkdepends", []),
-                "sources": item.get("sources", []),
-                "validpgpkeys": item.get("validpgpkeys", []),
-                "pkgfile": pkgfile,
-            }
-            count += 1
-            # local_logger.debug(
-            #    f"  Parsed Local PkgBase='{key_pkgbase}' (Name='{actual_name}'): Base='{item.get('pkgver')}', Rel='{item.get('pkgrel')}'"
-            # )
-        local_logger.info(f"Parsed local data for {count} unique PkgBase entries.")
-    except subprocess.TimeoutExpired:
-        local_logger.error(f"Call to '{actual_script_path}' timed out.")
-    except json.JSONDecodeError as e:
-        local_logger.error(
-            f"Failed to parse JSON from '{actual_script_path}': {e}\nData: {res_json[:500]}..."
+    except subprocess.TimeoutExpired as e:
+        # Lines read before the kill; PYTHONUNBUFFERED keeps them complete
+        stdout_data = e.stdout or ""
+        if isinstance(stdout_data, bytes):
+            stdout_data = stdout_data.decode("utf-8", "replace")
+        nv_logger.error(
+            f"NVChecker {label} timed out after {NVCHECKER_SHARD_TIMEOUT}s; "
+            f"keeping its partial output."
         )
     except Exception as e:
-        local_logger.error(
-            f"Local PKGBUILD fetch error: {e}",
-            exc_info=local_logger.isEnabledFor(logging.DEBUG),
+        nv_logger.error(f"NVChecker {label} execution error: {e}", exc_info=True)
+    elapsed = time.monotonic() - start
+
+    if stdout_data.strip():
+        nv_logger.debug(
+            f"NVChecker {label} STDOUT (first 500c): {stdout_data.strip()[:500]}..."
         )
-    return local_data_by_pkgbase
+    results = _parse_nvchecker_output(stdout_data, nv_logger)
+    nv_logger.info(
+        f"NVChecker {label} reported {len(results)} package(s) in {elapsed:.1f}s."
+    )
+    # Logged versions cover a shard killed before it wrote newver.json
+    versions = {
+        name: {
+            "version": r["nvchecker_pkgver"],
+            "url": r["nvchecker_raw_log"].get("url"),
+        }
+        for name, r in results.items()
+        if r["nvchecker_event"] in ("updated", "up-to-date")
+    }
+    try:
+        with open(newver_json_path) as f:
+            newver = json.load(f)
+        if newver.get("version") == 2:
+            versions.update(newver.get("data", {}))
+    except (OSError, ValueError, AttributeError) as e:
+        nv_logger.warning(f"Cannot read {label} newver file: {e}")
+    return results, elapsed, versions
 
 
 def run_nvchecker(
@@ -634,12 +2575,20 @@ def run_nvchecker(
     key_toml_path_arg,
     manual_packages=None,
     logger=DEFAULT_LOGGER,
+    ignored_dirs=DEFAULT_IGNORED_DIRS,
+    cache_dir=None,
+    version_cache_ttls=None,
+    force_refresh=False,
+    engine="subprocess",
+    schedule=False,
+    max_checks=0,
 ):
     nv_logger = logger.getChild("nvchecker")
     results_by_pkgbase = {}
     abs_path_root = os.path.abspath(path_root)
-    glob_pattern = os.path.join(abs_path_root, "**", ".nvchecker.toml")
-    toml_files = glob.glob(glob_pattern, recursive=True)
+    toml_files = list(
+        discover_package_files(abs_path_root, ignored_dirs, logger)[".nvchecker.toml"]
+    )
 
     if manual_packages:
         nv_logger.info(
@@ -666,145 +2615,168 @@ def run_nvchecker(
         return results_by_pkgbase
     nv_logger.info(f"Found {len(toml_files)} .nvchecker.toml file(s).")
 
-    with tempfile.TemporaryDirectory(prefix="aurupdater_nv_") as tmpdir:
-        all_nv_tomls_path, oldver_json_path, newver_json_path = (
-            os.path.join(tmpdir, f)
-            for f in ["all_nv.toml", "oldver.json", "newver.json"]
-        )
-        key_file_to_use = None
-        if key_toml_path_arg:
-            abs_user_key = os.path.abspath(key_toml_path_arg)
-            if os.path.exists(abs_user_key):
-                key_file_to_use = abs_user_key
-                nv_logger.info(f"Using user key file: {key_file_to_use}")
-            else:
-                nv_logger.warning(f"User key file '{abs_user_key}' not found.")
+    user_keys = {}
+    if key_toml_path_arg:
+        abs_user_key = os.path.abspath(key_toml_path_arg)
+        if os.path.exists(abs_user_key):
+            nv_logger.info(f"Using user key file: {abs_user_key}")
+            user_keys = read_nvchecker_keys(abs_user_key, nv_logger)
         else:
-            gh_token = os.environ.get("GITHUB_TOKEN")
-            if gh_token:
-                temp_key_file = os.path.join(tmpdir, "env_gh_key.toml")
-                try:
-                    with open(temp_key_file, "w") as f:
-                        f.write(f"[keys]\ngithub = '{gh_token}'\n")
-                    key_file_to_use = temp_key_file
-                    nv_logger.info(
-                        f"Using temp key file from GITHUB_TOKEN: {key_file_to_use}"
-                    )
-                except Exception as e:
-                    nv_logger.error(f"Failed to write temp key file: {e}")
-            else:
-                nv_logger.info(
-                    "No --key-toml and no GITHUB_TOKEN. NVChecker proceeds without GitHub keys."
-                )
+            nv_logger.warning(f"User key file '{abs_user_key}' not found.")
+    github_tokens = github_pool_tokens(user_keys, os.environ)
+    github_pool = None
+    if github_tokens:
+        github_pool = GitHubTokenPool(github_tokens, nv_logger)
+        github_pool.refresh()
+    else:
+        nv_logger.info(
+            "No GitHub token in --key-toml, GITHUB_TOKEN or GITHUB_TOKENS. NVChecker proceeds without GitHub keys."
+        )
 
-        content = [
-            "[__config__]\n",
-            f"oldver = '{os.path.basename(oldver_json_path)}'\n",
-            f"newver = '{os.path.basename(newver_json_path)}'\n\n",
-        ]
-        for tf in toml_files:
-            try:
-                with open(tf, "r") as f:
-                    content.extend(
-                        [
-                            f"# Source: {os.path.relpath(tf, abs_path_root)}\n",
-                            f.read(),
-                            "\n\n",
-                        ]
-                    )
-            except Exception as e:
-                nv_logger.error(f"Error reading {tf}: {e}")
-                continue
-        with open(all_nv_tomls_path, "w") as f:
-            f.write("".join(content))
-        if nv_logger.isEnabledFor(logging.DEBUG):
-            nv_logger.debug(
-                f"Concatenated .nvchecker.toml (first 500c):\n{''.join(content)[:500]}..."
-            )
-        with open(oldver_json_path, "w") as f:
-            json.dump({"version": 2, "data": oldver_data_for_nvchecker}, f)
+    version_cache_path = None
+    cache_entries, pending = {}, {}
+    if cache_dir and (version_cache_ttls or schedule or max_checks):
+        version_cache_path = os.path.join(cache_dir, NVCHECKER_VERSION_CACHE_FILENAME)
+        cache_entries = load_state_file(version_cache_path, nv_logger).get(
+            "entries", {}
+        )
+    if version_cache_path:
+        toml_files, pending, cached_results = partition_by_version_cache(
+            toml_files,
+            cache_entries,
+            version_cache_ttls or {},
+            oldver_data_for_nvchecker,
+            force_refresh,
+            nv_logger,
+            schedule=schedule,
+            max_checks=max_checks,
+        )
+        results_by_pkgbase.update(cached_results)
+        if not toml_files:
+            return results_by_pkgbase
+    with tempfile.TemporaryDirectory(prefix="aurupdater_nv_") as tmpdir:
         if nv_logger.isEnabledFor(logging.DEBUG):
             json_str = json.dumps(
                 {"version": 2, "data": oldver_data_for_nvchecker}, indent=2
             )
             truncated = (json_str[:500] + "...") if len(json_str) > 500 else json_str
             nv_logger.debug(f"Oldver JSON for NVChecker (truncated): {truncated}")
-        with open(newver_json_path, "w") as f:
-            json.dump({}, f)
 
-        cmd = ["nvchecker", "-c", os.path.basename(all_nv_tomls_path), "--logger=json"]
-        if key_file_to_use:
-            cmd.extend(["-k", key_file_to_use])
+        stats_path = None
+        seconds_per_package = None
+        if cache_dir:
+            stats_path = os.path.join(cache_dir, NVCHECKER_STATS_FILENAME)
+            seconds_per_package = load_state_file(stats_path, nv_logger).get(
+                "seconds_per_package"
+            )
+        shard_count = nvchecker_shard_count(len(toml_files), seconds_per_package)
+        # Round-robin, so packages from one directory neighbourhood spread out
+        shards = [toml_files[i::shard_count] for i in range(shard_count)]
+        nv_logger.info(
+            f"Running NVChecker in {shard_count} shard(s) "
+            f"(CPUs: {os.cpu_count()}, last seen: "
+            f"{f'{seconds_per_package:.2f}s' if seconds_per_package else 'n/a'} per package)."
+        )
 
-        nv_logger.info(f'Running NVChecker: "{" ".join(cmd)}" (in {tmpdir})')
-        stdout_data, stderr_data, code = "", "", 1
-        try:
-            proc = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                cwd=tmpdir,
-                check=False,
-                timeout=180,
+        # nvchecker only sends a token it was given; the pool then picks the
+        # token for each request
+        github_token = (github_pool.ranked() or [None])[0] if github_pool else None
+        key_file = None
+        if user_keys or github_token:
+            key_file = write_nvchecker_keyfile(
+                os.path.join(tmpdir, "keys.toml"), user_keys, github_token
             )
-            stdout_data, stderr_data, code = proc.stdout, proc.stderr, proc.returncode
-            if code != 0:
-                nv_logger.error(f"NVChecker exited with code {code}.")
-            if stderr_data:
-                nv_logger.warning(f"NVChecker STDERR:\n{stderr_data.strip()}")
-            if not stdout_data.strip() and code == 0:
-                nv_logger.info("NVChecker ran successfully, no JSON output on STDOUT.")
-        except FileNotFoundError:
-            nv_logger.critical("nvchecker command not found.")
-            return results_by_pkgbase
-        except subprocess.TimeoutExpired:
-            nv_logger.error("NVChecker command timed out.")
-            return results_by_pkgbase
-        except Exception as e:
-            nv_logger.error(f"NVChecker execution error: {e}", exc_info=True)
-            return results_by_pkgbase
 
-        if stdout_data.strip():
-            nv_logger.debug(
-                f"NVChecker STDOUT (first 500c): {stdout_data.strip()[:500]}..."
+        outcome = None
+        if engine == "inprocess":
+            outcome = _run_nvchecker_inprocess(
+                toml_files,
+                oldver_data_for_nvchecker,
+                key_file,
+                shard_count,
+                github_pool,
+                nv_logger,
             )
-        for line in stdout_data.strip().split("\n"):
-            if not line.strip():
-                continue
-            try:
-                entry = json.loads(line)
-                if entry.get("logger_name") != "nvchecker.core":
-                    nv_logger.debug(f"Skipping NVCR log: {line[:100]}...")
-                    continue
-                name = entry.get("name")  # This is the pkgbase
-                if not name:
-                    nv_logger.warning(f"NVCR JSON line missing 'name': {line}")
-                    continue
-                results_by_pkgbase[name] = {
-                    "nvchecker_name_reported": name,
-                    "nvchecker_pkgver": entry.get("version"),
-                    "nvchecker_event": entry.get("event"),
-                    "nvchecker_raw_log": entry,
-                }
-                ev, v, ov, lvl, msg = (
-                    entry.get("event"),
-                    entry.get("version", "N/A"),
-                    entry.get("old_version", "N/A"),
-                    entry.get("level"),
-                    entry.get("msg", ""),
+        if outcome is not None:
+            outcomes = [outcome]
+        else:
+            command, env = ["nvchecker"], None
+            if github_token and importlib.util.find_spec("nvchecker"):
+                command = [
+                    sys.executable,
+                    "-c",
+                    NVCHECKER_POOL_BOOTSTRAP,
+                    os.path.dirname(os.path.abspath(__file__)),
+                    os.path.splitext(os.path.basename(__file__))[0],
+                ]
+                env = {**os.environ, NVCHECKER_POOL_ENV: github_pool.to_json()}
+            elif github_token:
+                nv_logger.warning(
+                    f"nvchecker module not importable; shards send every GitHub "
+                    f"request with token {GitHubTokenPool.label(github_token)}."
                 )
-                if ev == "updated":
-                    nv_logger.info(f"NVCR: {name} UPDATED {ov} -> {v}")
-                # elif ev == "up-to-date":
-                #    nv_logger.info(f"NVCR: {name} UP-TO-DATE at {v}")
-                elif ev == "no-result":
-                    nv_logger.warning(f"NVCR: {name} NO-RESULT. {msg}")
-                elif lvl == "error" or entry.get("exc_info"):
-                    nv_logger.warning(
-                        f"NVCR: {name} ERROR - {entry.get('exc_info', msg)}"
-                    )
-            except json.JSONDecodeError:
-                nv_logger.warning(f"Failed to parse NVCR JSON: {line}")
+            if env is None and shutil.which("nvchecker") is None:
+                nv_logger.critical("nvchecker command not found.")
+                return results_by_pkgbase
+
+            def run_shard(numbered_shard):
+                number, shard_files = numbered_shard
+                return _run_nvchecker_shard(
+                    os.path.join(tmpdir, f"shard{number}"),
+                    f"shard {number}/{shard_count}",
+                    shard_files,
+                    abs_path_root,
+                    oldver_data_for_nvchecker,
+                    key_file,
+                    nv_logger,
+                    command=command,
+                    env=env,
+                )
+
+            with ThreadPoolExecutor(max_workers=shard_count) as pool:
+                outcomes = list(pool.map(run_shard, enumerate(shards, 1)))
+
+    shard_seconds = 0.0
+    checked_versions = {}
+    for results, elapsed, versions in outcomes:
+        results_by_pkgbase.update(results)
+        shard_seconds += elapsed
+        checked_versions.update(versions)
+    deferred = [
+        name
+        for name, result in results_by_pkgbase.items()
+        if result["nvchecker_event"] == "deferred"
+    ]
+    replayed = 0
+    for name in deferred:
+        del results_by_pkgbase[name]
+        config_hash = pending.pop(name, None)
+        entry = cache_entries.get(name)
+        if entry and entry.get("hash") == config_hash:
+            results_by_pkgbase[name] = _cached_nvchecker_result(
+                name, entry, oldver_data_for_nvchecker
+            )
+            replayed += 1
+    if deferred:
+        nv_logger.warning(
+            f"GitHub quota is at its reserve on every token: deferred "
+            f"{len(deferred)} check(s) to a later run, {replayed} replayed "
+            f"from the version cache."
+        )
+    if version_cache_path:
+        update_version_cache(
+            cache_entries, pending, checked_versions, schedule=schedule
+        )
+        save_state_file(version_cache_path, {"entries": cache_entries}, nv_logger)
+    if github_pool:
+        github_pool.refresh()
+    if stats_path and results_by_pkgbase:
+        # Per-package cost of a shard, as seen by the next run's shard count
+        save_state_file(
+            stats_path,
+            {"seconds_per_package": shard_seconds / len(toml_files)},
+            nv_logger,
+        )
     return results_by_pkgbase
 
 
@@ -1106,7 +3078,75 @@ class AurPackageUpdater:
             f"App logger '{self.logger.name}' effective level: {logging.getLevelName(self.logger.getEffectiveLevel())}"
         )
 
+    def _timed(self, phase, func, *args, **kwargs):
+        """Run one updater phase, recording its start/end relative to run()."""
+        start = time.monotonic()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.phase_timings[phase] = (start, time.monotonic())
+
+    def _log_phase_timings(self):
+        wall = time.monotonic() - self.run_started
+        total = sum(end - start for start, end in self.phase_timings.values())
+        self.logger.info(
+            f"Phase timings: {wall:.2f}s wall for {total:.2f}s of phase work."
+        )
+        for phase, (start, end) in sorted(
+            self.phase_timings.items(), key=lambda item: item[1]
+        ):
+            self.logger.info(
+                f"  {phase:<10} {start - self.run_started:7.2f}s -> "
+                f"{end - self.run_started:7.2f}s ({end - start:.2f}s)"
+            )
+
+    def _fetch_aur_data(self, data_source, cache_path, index_path, pkgnames):
+        try:
+            return get_combined_aur_data(
+                self.args.maintainer,
+                data_source=data_source,
+                logger=self.logger,
+                cache_path=cache_path,
+                cache_ttl=self.args.aur_cache_ttl,
+                index_path=index_path,
+                pkgnames=pkgnames,
+            )
+        except RuntimeError as e:
+            self.logger.critical(
+                f"Could not retrieve essential AUR data: {e}. Aborting."
+            )
+            sys.exit(1)
+        except Exception as e:
+            self.logger.error(
+                f"An unexpected error occurred while fetching AUR data: {e}",
+                exc_info=True,
+            )
+            sys.exit(1)
+
+    def _fetch_local_data(self, manual_packages_list):
+        return fetch_local_pkgbuild_data(
+            self.args.path_root,
+            self.args.pkgbuild_script,
+            manual_packages=manual_packages_list,
+            cache_dir=self.args.cache_dir,
+            logger=self.logger,
+            ignored_dirs=self.ignored_dirs,
+        )
+
     def run(self):
+        self.run_started = time.monotonic()
+        self.phase_timings = {}
+        self.ignored_dirs = tuple(self.args.ignore_dir or DEFAULT_IGNORED_DIRS)
+        self.version_cache_ttls = dict(self.args.nvchecker_cache_ttl or [])
+        if not self.args.cache_dir and (
+            self.version_cache_ttls
+            or self.args.nvchecker_schedule
+            or self.args.nvchecker_max_checks
+        ):
+            self.logger.warning(
+                "--nvchecker-cache-ttl, --nvchecker-schedule and "
+                "--nvchecker-max-checks have no effect without --cache-dir."
+            )
         manual_packages_list = None
         if self.args.manual_packages:
             try:
@@ -1126,60 +3166,83 @@ class AurPackageUpdater:
                 )
                 manual_packages_list = []
 
-        aur_data = {}
-        try:
-            aur_data = get_combined_aur_data(
-                self.args.maintainer,
-                data_source=self.args.aur_data_source,
-                logger=self.logger,
-            )
-        except RuntimeError as e:
-            self.logger.critical(
-                f"Could not retrieve essential AUR data: {e}. Aborting."
-            )
-            sys.exit(1)
-        except Exception as e:
-            self.logger.error(
-                f"An unexpected error occurred while fetching AUR data: {e}",
-                exc_info=True,
+        aur_cache_path = aur_index_path = None
+        if self.args.cache_dir:
+            os.makedirs(self.args.cache_dir, exist_ok=True)
+            aur_cache_path = os.path.join(self.args.cache_dir, AUR_METADATA_FILENAME)
+            aur_index_path = os.path.join(self.args.cache_dir, AUR_INDEX_FILENAME)
+
+        aur_data_source = self.args.aur_data_source
+        if manual_packages_list and aur_data_source != "info":
+            # A manual run only needs AUR data for the requested packages, so
+            # skip the search/dump and look those up directly.
+            self.logger.info(
+                f"Manual mode: fetching AUR data for the requested packages via "
+                f"RPC info instead of '{aur_data_source}'."
             )
-            sys.exit(1)
-
-        for pkgbase, data in aur_data.items():
-            self.all_package_data_by_pkgbase.setdefault(pkgbase, {}).update(data)
+            aur_data_source = "info"
 
+        # Phase graph: local extraction runs alongside the AUR fetch (which
+        # needs it first in info mode); nvchecker only needs the AUR oldver
+        # map, so it starts as soon as that is known.
         if not os.path.isdir(self.args.path_root):
             self.logger.critical(
                 f"Path root '{self.args.path_root}' is not valid. Exiting."
             )
             sys.exit(1)
-        local_data = fetch_local_pkgbuild_data(
-            self.args.path_root,
-            self.args.pkgbuild_script,
-            manual_packages=manual_packages_list,
-            logger=self.logger,
-        )
-        for pkgbase, data in local_data.items():
-            self.all_package_data_by_pkgbase.setdefault(pkgbase, {}).update(data)
-
-        nvchecker_oldver_input = {
-            pb: {"version": d["aur_pkgver"]}
-            for pb, d in self.all_package_data_by_pkgbase.items()
-            if d.get("aur_pkgver")
-        }
-        nvchecker_data = run_nvchecker(
-            self.args.path_root,
-            nvchecker_oldver_input,
-            self.args.key_toml,
-            manual_packages=manual_packages_list,
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            local_future = pool.submit(
+                self._timed, "local", self._fetch_local_data, manual_packages_list
+            )
+            pkgnames = None
+            if aur_data_source == "info":
+                # Info mode looks up exactly the packages found locally
+                pkgnames = local_package_names(local_future.result())
+            aur_data = self._timed(
+                "aur",
+                self._fetch_aur_data,
+                aur_data_source,
+                aur_cache_path,
+                aur_index_path,
+                pkgnames,
+            )
+            nvchecker_oldver_input = {
+                pb: {"version": d["aur_pkgver"]}
+                for pb, d in aur_data.items()
+                if d.get("aur_pkgver")
+            }
+            nvchecker_future = pool.submit(
+                self._timed,
+                "nvchecker",
+                run_nvchecker,
+                self.args.path_root,
+                nvchecker_oldver_input,
+                self.args.key_toml,
+                manual_packages=manual_packages_list,
+                logger=self.logger,
+                ignored_dirs=self.ignored_dirs,
+                cache_dir=self.args.cache_dir,
+                version_cache_ttls=self.version_cache_ttls,
+                force_refresh=self.args.nvchecker_refresh,
+                engine=self.args.nvchecker_engine,
+                schedule=self.args.nvchecker_schedule,
+                max_checks=self.args.nvchecker_max_checks,
+            )
+            local_data = local_future.result()
+            nvchecker_data = nvchecker_future.result()
+
+        # Merged in the same order as before so the output order is unchanged
+        for source in (aur_data, local_data, nvchecker_data):
+            for pkgbase, data in source.items():
+                self.all_package_data_by_pkgbase.setdefault(pkgbase, {}).update(data)
+
+        final_output_list = self._timed(
+            "compare",
+            process_and_compare_data,
+            self.all_package_data_by_pkgbase,
             logger=self.logger,
         )
-        for pkgbase, data in nvchecker_data.items():
-            self.all_package_data_by_pkgbase.setdefault(pkgbase, {}).update(data)
-
-        final_output_list = process_and_compare_data(
-            self.all_package_data_by_pkgbase, logger=self.logger
-        )
+        self._log_phase_timings()
 
         output_stream = (
             open(self.args.output_file, "w") if self.args.output_file else sys.stdout
@@ -1207,8 +3270,8 @@ def main_cli():
     parser.add_argument(
         "--aur-data-source",
         default="rpc",
-        choices=["rpc", "file"],
-        help="Method to fetch AUR data. 'rpc' has a limit of approximately 200 packages, 'file' would capture all AUR packages and support any number of results.",
+        choices=["rpc", "file", "info"],
+        help="Method to fetch AUR data. 'rpc' has a limit of approximately 200 packages, 'file' would capture all AUR packages and support any number of results, 'info' looks up only the locally found packages in batched RPC info requests.",
     )
     parser.add_argument(
         "--path-root",
@@ -1228,13 +3291,62 @@ def main_cli():
     parser.add_argument(
         "--key-toml",
         default=None,
-        help="Path to NVChecker's key.toml. Checks GITHUB_TOKEN env var if not set.",
+        help="Path to NVChecker's key.toml. Its github/github.com keys and optional github_pool list are pooled with the GITHUB_TOKEN and GITHUB_TOKENS (whitespace/comma separated) env vars; each GitHub request uses the token with the most quota left.",
     )
     parser.add_argument(
         "--manual-packages",
         default=None,
         help="JSON string of a list of package names to process manually.",
     )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for state kept between runs (e.g. the PKGBUILD extraction cache). Disabled if not set.",
+    )
+    parser.add_argument(
+        "--aur-cache-ttl",
+        type=int,
+        default=DEFAULT_AUR_CACHE_TTL,
+        help="Seconds a cached AUR metadata file is used before it is revalidated with the server. Only persists across runs with --cache-dir.",
+    )
+    parser.add_argument(
+        "--nvchecker-engine",
+        default="subprocess",
+        choices=NVCHECKER_ENGINES,
+        help="How nvchecker is run: 'subprocess' runs the nvchecker command in parallel shards, 'inprocess' drives the nvchecker Python module directly and falls back to the command if it is unavailable.",
+    )
+    parser.add_argument(
+        "--nvchecker-cache-ttl",
+        action="append",
+        type=nvchecker_cache_ttl_spec,
+        default=None,
+        metavar="[NAME=]SECONDS",
+        help="Cache upstream versions for SECONDS and leave fresh entries out of the nvchecker run (repeatable). NAME is an nvchecker entry or source type (e.g. github=86400); a bare value is the default. Entries without a TTL are always checked. Requires --cache-dir; off if not set.",
+    )
+    parser.add_argument(
+        "--nvchecker-schedule",
+        action="store_true",
+        help="Check each nvchecker entry on a schedule learned from its upstream release history: frequently releasing projects every run, dormant ones every few days. Entries not yet due replay their cached version. Requires --cache-dir.",
+    )
+    parser.add_argument(
+        "--nvchecker-max-checks",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Check at most N .nvchecker.toml files per run, most overdue first; the rest replay their cached version until a later run (0 = no cap). Requires --cache-dir.",
+    )
+    parser.add_argument(
+        "--nvchecker-refresh",
+        action="store_true",
+        help="Check everything this run, ignoring cached versions, the schedule and --nvchecker-max-checks; results are still recorded.",
+    )
+    parser.add_argument(
+        "--ignore-dir",
+        action="append",
+        default=None,
+        metavar="NAME",
+        help=f"Directory name never searched for packages (repeatable; replaces the default {', '.join(DEFAULT_IGNORED_DIRS)}). Dot-directories, and src/pkg inside package directories, are always skipped.",
+    )
     parser.add_argument(
         "--output-file", default=None, help="File for JSON output (default: STDOUT)."
     )
@@ -1250,15 +3362,19 @@ def main_cli():
         app.logger.critical(f"Unhandled exception: {e}", exc_info=True)
         sys.exit(2)
     finally:
-        # Cleanup the cache file on exit
-        if os.path.exists(CACHE_FILE_PATH):
+        # Cleanup the temporary cache file on exit; --cache-dir keeps it for revalidation
+        for path in (
+            CACHE_FILE_PATH,
+            CACHE_FILE_PATH + AUR_METADATA_INFO_SUFFIX,
+            CACHE_FILE_PATH + AUR_SUBSET_SNAPSHOT_SUFFIX,
+        ):
+            if args.cache_dir or not os.path.exists(path):
+                continue
             try:
-                os.remove(CACHE_FILE_PATH)
-                app.logger.info(f"Cleaned up cache file: {CACHE_FILE_PATH}")
+                os.remove(path)
+                app.logger.info(f"Cleaned up cache file: {path}")
             except OSError as e:
-                app.logger.warning(
-                    f"Error cleaning up cache file {CACHE_FILE_PATH}: {e}"
-                )
+                app.logger.warning(f"Error cleaning up cache file {path}: {e}")
 
 
 if __name__ == "__main__":
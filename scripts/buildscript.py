@@ -8,6 +8,7 @@ import subprocess
 import sys
 import re
 import shlex
+import sqlite3
 from dataclasses import dataclass, asdict, field
 from pathlib import Path
 import base64
@@ -111,6 +112,7 @@ class BuildConfig:
     base_build_dir: Path
     build_mode: str = "nobuild"
     artifacts_dir: Optional[str] = None
+    aur_index: Optional[str] = None
     debug: bool = False
 
 
@@ -1165,7 +1167,12 @@ class ArchPackageBuilder:
             return False
 
     def _find_package_providers(self, package: str) -> list:
-        """Find packages that provide the given package name using AUR API."""
+        """Find packages that provide the given package name (local AUR index, then AUR API)."""
+        if self.config.aur_index and os.path.exists(self.config.aur_index):
+            providers = self._find_package_providers_in_index(package)
+            if providers:
+                return providers
+
         try:
             import requests
 
@@ -1193,6 +1200,28 @@ class ArchPackageBuilder:
             self.logger.warning(f"Failed to query AUR API for package providers: {e}")
             return []
 
+    def _find_package_providers_in_index(self, package: str) -> list:
+        """Look up providers in the updater's local AUR index (read-only)."""
+        try:
+            conn = sqlite3.connect(f"file:{self.config.aur_index}?mode=ro", uri=True)
+            try:
+                rows = conn.execute(
+                    "SELECT name FROM packages WHERE name = ? "
+                    "UNION SELECT name FROM provides WHERE provides = ? "
+                    "ORDER BY name",
+                    (package, package),
+                ).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self.logger.debug(f"AUR index lookup failed for '{package}': {e}")
+            return []
+        package_names = [row[0] for row in rows]
+        self.logger.debug(
+            f"AUR index returned providers for '{package}': {package_names}"
+        )
+        return package_names
+
     def _sign_package_files(self, package_files: List[Path]) -> List[Path]:
         """Sign each package file with GPG and return list of original + .sig files."""
         gpg_key = os.environ.get("GPG_SIGNATURE")
@@ -1871,6 +1900,11 @@ def main():
         type=Path,
         help="Base directory where package-specific temporary build directories will be created.",
     )
+    parser.add_argument(
+        "--aur-index",
+        default=None,
+        help="SQLite AUR index written by aur_package_updater_cli.py, used for provider lookups before the AUR API.",
+    )
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
 
     args = parser.parse_args()
@@ -25,6 +25,12 @@ NVCHECKER_RUN_DIR = Path(
 PACKAGE_BUILD_BASE_DIR = Path(
     os.getenv("PACKAGE_BUILD_BASE_DIR", str(BUILDER_HOME / "pkg_builds"))
 )
+# Persisted between workflow runs by actions/cache
+UPDATER_CACHE_DIR = Path(
+    os.getenv("UPDATER_CACHE_DIR", str(BUILDER_HOME / ".cache" / "aur_updater"))
+)
+# Written by the updater (--aur-data-source file), read by buildscript.py
+AUR_INDEX_PATH = UPDATER_CACHE_DIR / "aur_index.sqlite3"
 
 GITHUB_WORKSPACE = Path(os.getenv("GITHUB_WORKSPACE", "/github/workspace"))
 ARTIFACTS_DIR = Path(os.getenv("ARTIFACTS_DIR", str(GITHUB_WORKSPACE / "artifacts")))
@@ -161,6 +167,24 @@ def setup_environment() -> bool:
             log_error("SETUP_FAIL", f"mkdir for {d_path} as {BUILDER_USER} failed.")
             end_group()
             return False
+    # A restored actions/cache is owned by root; the cache is an optimisation
+    # only, so failures here are not fatal.
+    try:
+        run_command(["sudo", "mkdir", "-p", str(UPDATER_CACHE_DIR)], check=False)
+        run_command(
+            [
+                "sudo",
+                "chown",
+                "-R",
+                f"{BUILDER_USER}:{BUILDER_USER}",
+                str(UPDATER_CACHE_DIR),
+            ],
+            check=False,
+        )
+    except:
+        log_warning(
+            "SETUP_CACHE_WARN", f"Could not prepare cache dir {UPDATER_CACHE_DIR}."
+        )
     try:
         ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
     except Exception as e:
@@ -210,11 +234,21 @@ def setup_environment() -> bool:
 
 def create_nvchecker_keyfile() -> bool:
     start_group("Create NVChecker Keyfile for Updater CLI")
-    if not SECRET_GHUK_VALUE:
-        log_warning("KEYFILE_SKIP", "SECRET_GHUK_VALUE not set. Skipping keyfile.")
+    # SECRET_GHUK_VALUE may hold several tokens (whitespace/comma separated);
+    # the workflow's GH_TOKEN joins them. The updater pools all of them.
+    tokens = list(
+        dict.fromkeys((SECRET_GHUK_VALUE or "").replace(",", " ").split() + [GH_TOKEN])
+    )
+    tokens = [t for t in tokens if t]
+    if not tokens:
+        log_warning(
+            "KEYFILE_SKIP", "SECRET_GHUK_VALUE and GH_TOKEN not set. Skipping keyfile."
+        )
         end_group()
         return True
-    keyfile_content = f"[keys]\ngithub = '{SECRET_GHUK_VALUE}'\n"
+    keyfile_content = f"[keys]\ngithub = {json.dumps(tokens[0])}\n"
+    if len(tokens) > 1:
+        keyfile_content += f"github_pool = {json.dumps(tokens[1:])}\n"
     temp_keyfile_path = NVCHECKER_RUN_DIR / "temp_keyfile.toml"
     try:
         with open(temp_keyfile_path, "w") as f:
@@ -268,8 +302,10 @@ def run_aur_updater_cli(
         "--pkgbuild-script",
         str(pkgbuild_script_path_for_cli),  # Pass the correct script path
         "--summary",  # Summarize results to stdout
+        "--cache-dir",
+        str(UPDATER_CACHE_DIR),
         "--aur-data-source",
-        "file",  # can be file or rpc - rpc can support ~ 200 packages, file has no such limitations
+        "file",  # file, rpc or info - rpc can support ~ 200 packages, file and info (batched lookups of local packages) have no such limitations
     ]
     if KEYFILE_PATH.exists():
         cmd.extend(["--key-toml", str(KEYFILE_PATH)])
@@ -537,6 +573,8 @@ def execute_build_script_py(
         str(pkg_artifact_dir),
         "--base-build-dir",
         str(PACKAGE_BUILD_BASE_DIR),
+        "--aur-index",
+        str(AUR_INDEX_PATH),
     ]
     if os.getenv("RUNNER_DEBUG") == "1" or os.getenv("ACTIONS_STEP_DEBUG") == "true":
         bs_cmd.append("--debug")
@@ -1,11 +1,26 @@
 #!/usr/bin/env python3
 
 import argparse
+import hashlib
 import subprocess
 import json
 import os
+import queue
+import re
+import resource
+import select
+import signal
+import tempfile
+import threading
+import time
+from collections import Counter
 from pathlib import Path
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
 import sys
 import logging
 
@@ -17,163 +32,1256 @@ logging.basicConfig(
 )
 logger = logging.getLogger("pkgbuild_to_json")
 
+# Bump when the shape of the cached result changes. The extraction script itself
+# is hashed into every cache key, so edits to it invalidate entries on their own.
+CACHE_SCHEMA_VERSION = 1
+DEFAULT_CACHE_MAX_ENTRIES = 4096
+# Hits refresh an entry's last-used time only once it is this old, so a run
+# that only hits the cache leaves the file alone
+CACHE_LAST_USED_RESOLUTION = 24 * 3600
+PKGBUILD_TIMEOUT = 10  # seconds allowed for sourcing a single PKGBUILD
 
-def parse_pkgbuild_output(output_str: str) -> dict:
-    data = {}
-    current_key_map = {
-        "PKGNAME": "pkgname",
-        "PKGBASE": "pkgbase",
-        "PKGVER": "pkgver",
-        "PKGREL": "pkgrel",
-        "DEPENDS": "depends",
-        "MAKEDEPENDS": "makedepends",
-        "CHECKDEPENDS": "checkdepends",
-        "SOURCE": "sources",
-        "VALIDPGPKEYS": "validpgpkeys",
-    }
+# `source file` / `. file` lines; any files named this way are hashed into the
+# cache key alongside the PKGBUILD itself.
+SOURCE_DIRECTIVE_RE = re.compile(r"^\s*(?:source|\.)\s+([^\s;&|)]+)", re.MULTILINE)
+
+# JSON field -> (kind, shell variables it is read from). Fields are emitted in
+# this order. "comment" fields are read from the file text, not by sourcing it.
+EXTRACT_FIELDS = {
+    "pkgbase": ("scalar", ["pkgbase"]),
+    "pkgname": ("scalar", ["pkgname"]),
+    "pkgver": ("scalar", ["pkgver"]),
+    "pkgrel": ("scalar", ["pkgrel"]),
+    "depends": ("array", ["depends"]),
+    "makedepends": ("array", ["makedepends"]),
+    "checkdepends": ("array", ["checkdepends"]),
+    "validpgpkeys": ("array", ["validpgpkeys"]),
+    "sources": ("array", ["source"]),
+    "epoch": ("scalar", ["epoch"]),
+    "arch": ("array", ["arch"]),
+    "license": ("array", ["license"]),
+    "provides": ("array", ["provides"]),
+    "conflicts": ("array", ["conflicts"]),
+    "optdepends": ("array", ["optdepends"]),
+    "checksums": (
+        "checksums",
+        [
+            "cksums",
+            "md5sums",
+            "sha1sums",
+            "sha224sums",
+            "sha256sums",
+            "sha384sums",
+            "sha512sums",
+            "b2sums",
+        ],
+    ),
+    "ci_flags": ("comment", []),
+}
+# What the updater consumes; also the default --fields.
+DEFAULT_FIELDS = [
+    "pkgbase",
+    "pkgname",
+    "pkgver",
+    "pkgrel",
+    "depends",
+    "makedepends",
+    "checkdepends",
+    "validpgpkeys",
+    "sources",
+]
+# Always extracted, a result without either is an error.
+REQUIRED_FIELDS = ["pkgbase", "pkgname"]
+
+# `# ci|flag,forcedep=a b,prebuild=x.sh,envset_VAR=1|` runner hints, as parsed
+# by buildscript.py
+CI_FLAGS_RE = re.compile(r"^\s*#\s*ci\|([^|]+)\|", re.MULTILINE)
+
+# The PKGBUILD path is passed as $1 rather than interpolated, so the script text
+# is constant for a field set and can be hashed into the cache key.
+#
+# Output is framed rather than delimited by marker lines: every variable is a
+# header line "<name> <count>" followed by <count> values written as
+# "<byte length>:<value>\n". LC_ALL=C makes ${#v} count bytes. A final "."
+# marks complete output (and survives the coproc worker's $(...) capture, which
+# strips trailing newlines). Anything the PKGBUILD itself prints while being
+# sourced is discarded.
+_EXTRACT_SCRIPT_TEMPLATE = """# fields: {fields}
+set -e
+
+unset {variables}
+
+__pkgbuild_to_json_file=$1
+set --
+. "$__pkgbuild_to_json_file" >/dev/null
+
+__pkgbuild_to_json_field() {{
+    local __name=$1 __value
+    shift
+    printf '%s %d\\n' "$__name" "$#"
+    for __value in "$@"; do printf '%d:%s\\n' "${{#__value}}" "$__value"; done
+}}
+LC_ALL=C
+
+{emitters}
+printf .
+"""
+
+
+def resolve_fields(requested) -> list:
+    """Validate a field projection and return it in output order."""
+    unknown = set(requested) - set(EXTRACT_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown field(s): {', '.join(sorted(unknown))}")
+    wanted = set(requested) | set(REQUIRED_FIELDS)
+    return [field for field in EXTRACT_FIELDS if field in wanted]
+
+
+def build_extract_script(fields) -> str:
+    """Bash script that sources $1 and prints the variables behind `fields`."""
+    variables, emitters = [], []
+    for field in fields:
+        kind, names = EXTRACT_FIELDS[field]
+        for name in names:
+            variables.append(name)
+            value = f'"${{{name}:-}}"' if kind == "scalar" else f'"${{{name}[@]}}"'
+            emitters.append(f"__pkgbuild_to_json_field {name} {value}")
+    return _EXTRACT_SCRIPT_TEMPLATE.format(
+        fields=",".join(fields),
+        variables=" ".join(variables),
+        emitters="\n".join(emitters),
+    )
 
-    active_key_internal = None
-    active_key_json = None
-    current_values = []
 
-    lines = output_str.splitlines()
+BASH_EXTRACT_SCRIPT = build_extract_script(DEFAULT_FIELDS)
 
-    for line in lines:
-        line = line.strip()
-        if not line and not active_key_internal:
+# Long-lived worker for the coproc backend. It reads NUL-terminated PKGBUILD
+# paths on stdin and runs BASH_EXTRACT_SCRIPT (passed as $1) for each one in a
+# forked subshell, so no state leaks between files. Every reply is a frame of
+# four NUL-terminated fields: exit status, stdout, stderr and the output of
+# `times`, whose second line is the CPU time of all finished children so far.
+# Bash strings cannot contain NUL, so the framing is unambiguous.
+BASH_WORKER_SCRIPT = """
+__extract=$1
+set --
+__errfile=$(mktemp)
+trap 'rm -f "$__errfile"' EXIT
+while IFS= read -r -d '' __pkgfile; do
+    __out=$(set -- "$__pkgfile"; eval "$__extract" </dev/null 2>"$__errfile")
+    __rc=$?
+    __err=
+    if [ "$__rc" -ne 0 ]; then __err=$(<"$__errfile"); fi
+    printf '%s\\0%s\\0%s\\0' "$__rc" "$__out" "$__err"
+    times
+    printf '\\0'
+done
+"""
+
+
+def _normalize_array(values: list) -> list:
+    return [
+        line.strip() for value in values for line in value.splitlines() if line.strip()
+    ]
+
+
+def normalize_fields(variables: dict) -> dict:
+    """
+    Turn raw variable values into result data, for every field whose variables
+    are present. Scalars keep their first line, array elements are split into
+    lines; everything is stripped and empty array entries are dropped.
+    """
+    data = {}
+    for field, (kind, names) in EXTRACT_FIELDS.items():
+        if not names or names[0] not in variables:
             continue
+        if kind == "scalar":
+            values = variables[names[0]]
+            lines = values[0].splitlines() if values else []
+            data[field] = lines[0].strip() if lines else ""
+        elif kind == "array":
+            data[field] = _normalize_array(variables[names[0]])
+        elif kind == "checksums":
+            data[field] = {
+                name: _normalize_array(variables[name])
+                for name in names
+                if variables.get(name)
+            }
+    return data
 
-        is_marker = False
-        for internal_marker, json_key in current_key_map.items():
-            if line == f"{internal_marker}_START":
-                if active_key_internal:
-                    logger.warning(
-                        f"Encountered new START marker '{line}' while '{active_key_internal}' was active."
-                    )
-                active_key_internal = internal_marker
-                active_key_json = json_key
-                current_values = []
-                is_marker = True
-                break
-            elif line == f"{internal_marker}_END":
-                if (
-                    active_key_internal == internal_marker
-                ):  # Correctly check against the active marker
-                    if active_key_json in ["pkgname", "pkgbase", "pkgver", "pkgrel"]:
-                        data[active_key_json] = (
-                            current_values[0] if current_values else ""
-                        )
-                    else:
-                        data[active_key_json] = [v for v in current_values if v]
-                    active_key_internal = None
-                    active_key_json = None
-                    current_values = []
-                    is_marker = True
-                    break
-                # If not the active marker, it might be a nested or badly ordered marker.
-                elif (
-                    active_key_internal is not None
-                ):  # only warn if an active key was expecting its own end
-                    logger.warning(
-                        f"Mismatched END marker. Expected '{active_key_internal}_END', got '{line}'."
-                    )
-
-        if not is_marker and active_key_internal:
-            current_values.append(line)
-
-    if active_key_internal and current_values:
-        logger.warning(
-            f"Data collection for '{active_key_internal}' might be incomplete (no END marker found)."
-        )
-        if active_key_json in ["pkgname", "pkgbase", "pkgver", "pkgrel"]:
-            data[active_key_json] = current_values[0] if current_values else ""
+
+def parse_ci_flags(text: str) -> dict:
+    """Parse the `# ci|...|` comment the same way buildscript.py does."""
+    ci_flags = {
+        "flags": [],
+        "forced_dependencies": [],
+        "prebuild_script": None,
+        "environment_variables": {},
+    }
+    match = CI_FLAGS_RE.search(text)
+    if not match:
+        return ci_flags
+    for item in (f.strip() for f in match.group(1).strip().split(",")):
+        if not item:
+            continue
+        if item.startswith("forcedep="):
+            ci_flags["forced_dependencies"].extend(item.split("=", 1)[1].split())
+        elif item.startswith("prebuild="):
+            ci_flags["prebuild_script"] = item.split("=", 1)[1].strip()
+        elif item.startswith("envset_"):
+            var, _, value = item[len("envset_") :].partition("=")
+            ci_flags["environment_variables"][var.strip()] = (
+                value.strip() if _ else "true"
+            )
         else:
-            data[active_key_json] = [v for v in current_values if v]
+            ci_flags["flags"].append(item)
+    return ci_flags
+
 
+def add_comment_fields(pkgbuild_filepath: Path, data: dict, fields) -> dict:
+    """Fill in fields read from the PKGBUILD text rather than by sourcing it."""
+    if "ci_flags" in fields and "error" not in data:
+        try:
+            text = pkgbuild_filepath.read_text(encoding="utf-8", errors="replace")
+        except OSError as e:
+            logger.warning(f"Cannot read '{pkgbuild_filepath}' for ci flags: {e}")
+        else:
+            data["ci_flags"] = parse_ci_flags(text)
     return data
 
 
-def process_single_pkgbuild(pkgbuild_filepath: Path) -> dict:
-    pkgbuild_filepath_abs = pkgbuild_filepath.resolve()
+def parse_pkgbuild_output(output: bytes) -> dict:
+    """
+    Parse the framed output of BASH_EXTRACT_SCRIPT in a single pass.
+    Raises ValueError if the output is truncated or malformed.
+    """
+    if not output.endswith(b"."):
+        raise ValueError("output is truncated")
+    fields = {}
+    pos, end = 0, len(output) - 1
+    while pos < end:
+        header_end = output.index(b"\n", pos)
+        name, count = output[pos:header_end].split(b" ")
+        pos = header_end + 1
+        values = []
+        for _ in range(int(count)):
+            colon = output.index(b":", pos)
+            value_end = colon + 1 + int(output[pos:colon])
+            if output[value_end : value_end + 1] != b"\n":
+                raise ValueError(f"bad value length in field '{name.decode()}'")
+            values.append(output[colon + 1 : value_end].decode("utf-8", "replace"))
+            pos = value_end + 1
+        fields[name.decode()] = values
+    return normalize_fields(fields)
 
-    bash_script = f"""
-    set -e
 
-    unset pkgver depends makedepends checkdepends
+def _sourced_files(pkgbuild_filepath: Path, content: bytes) -> list:
+    """Best-effort list of files a PKGBUILD pulls in via `source`/`.`."""
+    files = []
+    text = content.decode("utf-8", "replace")
+    for match in SOURCE_DIRECTIVE_RE.finditer(text):
+        target = match.group(1).strip("'\"")
+        if not target or "$" in target:
+            continue
+        target_path = Path(target)
+        if not target_path.is_absolute():
+            target_path = pkgbuild_filepath.parent / target_path
+        files.append(target_path)
+    return files
 
-    . "{pkgbuild_filepath_abs}"
 
-    echo "PKGBASE_START"
-    echo "${{pkgbase}}"
-    echo "PKGBASE_END"
+def pkgbuild_cache_key(
+    pkgbuild_filepath: Path, extract_script: str = BASH_EXTRACT_SCRIPT
+) -> str:
+    """SHA-256 over the extraction script, the PKGBUILD and the files it sources."""
+    content = pkgbuild_filepath.read_bytes()
+    digest = hashlib.sha256()
+    digest.update(f"schema={CACHE_SCHEMA_VERSION}\0".encode())
+    digest.update(extract_script.encode())
+    digest.update(b"\0")
+    digest.update(content)
+    for sourced in _sourced_files(pkgbuild_filepath, content):
+        digest.update(f"\0{sourced}\0".encode())
+        try:
+            digest.update(sourced.read_bytes())
+        except OSError:
+            digest.update(b"<missing>")
+    return digest.hexdigest()
 
-    echo "PKGNAME_START"
-    echo "${{pkgname}}"
-    echo "PKGNAME_END"
 
-    echo "PKGVER_START"
-    echo "${{pkgver:-}}"
-    echo "PKGVER_END"
+class ResultCache:
+    """
+    Persistent on-disk cache of extraction results, keyed by `pkgbuild_cache_key`.
 
-    echo "PKGREL_START"
-    echo "${{pkgrel:-}}"
-    echo "PKGREL_END"
+    Entries carry a last-used timestamp, refreshed at most once per
+    `CACHE_LAST_USED_RESOLUTION`; once the cache grows past `max_entries` the
+    least recently used ones are dropped when it is saved. Error results are
+    never cached.
+    """
 
-    echo "DEPENDS_START"
-    if [ "${{#depends[@]}}" -gt 0 ]; then printf '%s\\n' "${{depends[@]}}"; fi
-    echo "DEPENDS_END"
+    def __init__(self, path: Path, max_entries: int = DEFAULT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
 
-    echo "MAKEDEPENDS_START"
-    if [ "${{#makedepends[@]}}" -gt 0 ]; then printf '%s\\n' "${{makedepends[@]}}"; fi
-    echo "MAKEDEPENDS_END"
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                raw = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable cache file '{self.path}': {e}")
+            return
+        if not isinstance(raw, dict) or raw.get("schema") != CACHE_SCHEMA_VERSION:
+            logger.info(f"Cache file '{self.path}' has an old schema, starting fresh.")
+            self._dirty = True
+            return
+        self.entries = raw.get("entries", {})
 
-    echo "CHECKDEPENDS_START"
-    if [ "${{#checkdepends[@]}}" -gt 0 ]; then printf '%s\\n' "${{checkdepends[@]}}"; fi
-    echo "CHECKDEPENDS_END"
+    def clear(self):
+        self.entries = {}
+        self._dirty = True
 
-    echo "VALIDPGPKEYS_START"
-    if [ "${{#validpgpkeys[@]}}" -gt 0 ]; then printf '%s\\n' "${{validpgpkeys[@]}}"; fi
-    echo "VALIDPGPKEYS_END"
+    def get(self, key: str):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        now = time.time()
+        if now - entry.get("last_used", 0) >= CACHE_LAST_USED_RESOLUTION:
+            entry["last_used"] = now
+            self._dirty = True
+        return dict(entry["data"])
 
-    echo "SOURCE_START"
-    if [ "${{#source[@]}}" -gt 0 ]; then printf '%s\\n' "${{source[@]}}"; fi
-    echo "SOURCE_END"
-    """
+    def put(self, key: str, data: dict):
+        if "error" in data:
+            return
+        cached = {k: v for k, v in data.items() if k not in ("pkgfile", "timing")}
+        self.entries[key] = {"last_used": time.time(), "data": cached}
+        self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        if len(self.entries) > self.max_entries:
+            keep = sorted(
+                self.entries.items(),
+                key=lambda item: item[1].get("last_used", 0),
+                reverse=True,
+            )[: self.max_entries]
+            self.entries = dict(keep)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"schema": CACHE_SCHEMA_VERSION, "entries": self.entries}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to write cache file '{self.path}': {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+        self._dirty = False
+
+
+def _timing(via: str, wall: float, user: float = 0.0, sys_: float = 0.0) -> dict:
+    """Per-PKGBUILD timing attached to every record, in seconds."""
+    return {
+        "via": via,
+        "wall": round(wall, 4),
+        "user": round(user, 4),
+        "sys": round(sys_, 4),
+    }
+
+
+def _thread_rusage():
+    # RUSAGE_THREAD is Linux-only; elsewhere fall back to the whole process.
+    return resource.getrusage(getattr(resource, "RUSAGE_THREAD", resource.RUSAGE_SELF))
+
+
+def _timing_since(via: str, started: float, usage_before) -> dict:
+    """Timing for work done in Python on the calling thread."""
+    usage_after = _thread_rusage()
+    return _timing(
+        via,
+        time.monotonic() - started,
+        usage_after.ru_utime - usage_before.ru_utime,
+        usage_after.ru_stime - usage_before.ru_stime,
+    )
+
+
+def _result_from_bash(
+    pkgbuild_filepath: Path, returncode: int, stdout: bytes, stderr: str
+) -> dict:
+    if returncode != 0:
+        return {
+            "pkgfile": str(pkgbuild_filepath),
+            "error": f"Bash script failed with code {returncode}",
+            "stderr": stderr.strip(),
+        }
+
+    try:
+        parsed_data = parse_pkgbuild_output(stdout)
+    except ValueError as e:
+        return {
+            "pkgfile": str(pkgbuild_filepath),
+            "error": f"Malformed extractor output: {e}",
+        }
+    return _finish_result(pkgbuild_filepath, parsed_data)
+
+
+def _finish_result(pkgbuild_filepath: Path, parsed_data: dict) -> dict:
+    if not parsed_data.get("pkgname") and not parsed_data.get("pkgbase"):
+        return {
+            "pkgfile": str(pkgbuild_filepath),
+            "error": "Neither pkgname nor pkgbase could be extracted from PKGBUILD.",
+        }
+
+    parsed_data["pkgfile"] = str(pkgbuild_filepath)
+    return parsed_data
+
+
+def process_single_pkgbuild(
+    pkgbuild_filepath: Path, extract_script: str = BASH_EXTRACT_SCRIPT
+) -> dict:
+    pkgbuild_filepath_abs = pkgbuild_filepath.resolve()
+    # Pool processes run one PKGBUILD at a time, so RUSAGE_CHILDREN deltas are
+    # this file's bash alone.
+    usage_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    started = time.monotonic()
 
     try:
         result = subprocess.run(
-            ["bash", "-c", bash_script],
+            ["bash", "-c", extract_script, "bash", str(pkgbuild_filepath_abs)],
             capture_output=True,
-            text=True,
             check=False,
-            timeout=10,
+            timeout=PKGBUILD_TIMEOUT,
+        )
+        data = _result_from_bash(
+            pkgbuild_filepath,
+            result.returncode,
+            result.stdout,
+            result.stderr.decode("utf-8", "replace"),
         )
 
-        if result.returncode != 0:
-            return {
-                "pkgfile": str(pkgbuild_filepath),
-                "error": f"Bash script failed with code {result.returncode}",
-                "stderr": result.stderr.strip(),
-            }
+    except subprocess.TimeoutExpired:
+        data = {"pkgfile": str(pkgbuild_filepath), "error": "Processing timed out."}
+    except Exception as e:
+        data = {
+            "pkgfile": str(pkgbuild_filepath),
+            "error": f"An unexpected error occurred: {str(e)}",
+        }
+    usage_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    data["timing"] = _timing(
+        "bash",
+        time.monotonic() - started,
+        usage_after.ru_utime - usage_before.ru_utime,
+        usage_after.ru_stime - usage_before.ru_stime,
+    )
+    return data
+
+
+class _BashWorker:
+    """One persistent bash process running BASH_WORKER_SCRIPT."""
+
+    def __init__(self, extract_script: str = BASH_EXTRACT_SCRIPT):
+        self.extract_script = extract_script
+        self.proc = None
+        self._buf = b""
+        self._child_times = (0.0, 0.0)
+        self._spawn()
+
+    def _spawn(self):
+        # Own session so a timed-out PKGBUILD subshell can be killed with its worker
+        self.proc = subprocess.Popen(
+            ["bash", "-c", BASH_WORKER_SCRIPT, "bash", self.extract_script],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            start_new_session=True,
+        )
+        self._buf = b""
+        self._child_times = (0.0, 0.0)
+
+    def _kill(self):
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.proc.wait()
+        for stream in (self.proc.stdin, self.proc.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+    def close(self):
+        if self.proc.poll() is None:
+            try:
+                self.proc.stdin.close()
+                self.proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self._kill()
 
-        parsed_data = parse_pkgbuild_output(result.stdout)
+    def _read_frame(self, deadline: float) -> list:
+        fd = self.proc.stdout.fileno()
+        while self._buf.count(b"\0") < 4:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(self.proc.args, PKGBUILD_TIMEOUT)
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                continue
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise RuntimeError("bash worker exited unexpectedly")
+            self._buf += chunk
+        rc, out, err, times, self._buf = self._buf.split(b"\0", 4)
+        return int(rc), out, err.decode("utf-8", "replace"), times.decode()
 
-        if not parsed_data.get("pkgname") and not parsed_data.get("pkgbase"):
-            return {
+    def _cpu_delta(self, times: str):
+        """User/sys seconds since the previous reply, from `times` output."""
+
+        def seconds(field):
+            minutes, _, secs = field.rstrip("s").partition("m")
+            return int(minutes) * 60 + float(secs)
+
+        try:
+            user, sys_ = (seconds(f) for f in times.splitlines()[1].split())
+        except (IndexError, ValueError):
+            return 0.0, 0.0
+        prev_user, prev_sys = self._child_times
+        self._child_times = (user, sys_)
+        return user - prev_user, sys_ - prev_sys
+
+    def extract(self, pkgbuild_filepath: Path) -> dict:
+        pkgbuild_filepath_abs = pkgbuild_filepath.resolve()
+        started = time.monotonic()
+        try:
+            self.proc.stdin.write(os.fsencode(pkgbuild_filepath_abs) + b"\0")
+            self.proc.stdin.flush()
+            rc, out, err, times = self._read_frame(started + PKGBUILD_TIMEOUT)
+            data = _result_from_bash(pkgbuild_filepath, rc, out, err)
+            data["timing"] = _timing(
+                "bash", time.monotonic() - started, *self._cpu_delta(times)
+            )
+            return data
+        except subprocess.TimeoutExpired:
+            self._kill()
+            self._spawn()
+            data = {"pkgfile": str(pkgbuild_filepath), "error": "Processing timed out."}
+        except Exception as e:
+            self._kill()
+            self._spawn()
+            data = {
                 "pkgfile": str(pkgbuild_filepath),
-                "error": "Neither pkgname nor pkgbase could be extracted from PKGBUILD.",
+                "error": f"An unexpected error occurred: {str(e)}",
             }
+        data["timing"] = _timing("bash", time.monotonic() - started)
+        return data
 
-        parsed_data["pkgfile"] = str(pkgbuild_filepath)
-        return parsed_data
 
-    except subprocess.TimeoutExpired:
-        return {"pkgfile": str(pkgbuild_filepath), "error": "Processing timed out."}
-    except Exception as e:
-        return {
-            "pkgfile": str(pkgbuild_filepath),
-            "error": f"An unexpected error occurred: {str(e)}",
-        }
+def run_with_bash_workers(
+    pkgbuild_files, jobs: int, extract_script: str = BASH_EXTRACT_SCRIPT
+):
+    """
+    Extract PKGBUILDs on up to `jobs` persistent bash workers, yielding
+    (path, result) pairs as they complete. `pkgbuild_files` may be a lazy
+    iterable; it is drained on a feeder thread so extraction starts with the
+    first path and workers are only spawned once there is work for them.
+    """
+    work = queue.Queue(maxsize=jobs * 4)
+    done = queue.Queue()
+    _END = object()
+    fed = {"count": None, "error": None}
+
+    def feed():
+        count = 0
+        try:
+            for filepath in pkgbuild_files:
+                work.put(filepath)
+                count += 1
+        except Exception as e:
+            fed["error"] = e
+        finally:
+            fed["count"] = count
+            for _ in range(jobs):
+                work.put(_END)
+            done.put(_END)
+
+    def serve():
+        worker = None
+        try:
+            while True:
+                filepath = work.get()
+                if filepath is _END:
+                    return
+                started = time.monotonic()
+                try:
+                    if worker is None:
+                        worker = _BashWorker(extract_script)
+                    data = worker.extract(filepath)
+                except Exception as e:
+                    # Spawning (or respawning) bash failed; report this file
+                    # and try a fresh worker for the next one, so every file
+                    # fed still produces exactly one result.
+                    if worker is not None:
+                        try:
+                            worker.close()
+                        except Exception:
+                            pass
+                        worker = None
+                    data = {
+                        "pkgfile": str(filepath),
+                        "error": f"Could not start a bash worker: {e}",
+                        "timing": _timing("bash", time.monotonic() - started),
+                    }
+                done.put((filepath, data))
+        finally:
+            if worker is not None:
+                worker.close()
+
+    threads = [threading.Thread(target=feed, daemon=True)] + [
+        threading.Thread(target=serve, daemon=True) for _ in range(jobs)
+    ]
+    for thread in threads:
+        thread.start()
+    yielded = 0
+    while fed["count"] is None or yielded < fed["count"]:
+        item = done.get()
+        if item is _END:
+            continue
+        yielded += 1
+        yield item
+    for thread in threads:
+        thread.join()
+    if fed["error"] is not None:
+        raise fed["error"]
+
+
+def iter_file_list(stream, nul_separated: bool = False):
+    """Yield paths from a newline (or NUL) separated list as it is read."""
+    if not nul_separated:
+        for line in stream:
+            line = line.rstrip("\n")
+            if line:
+                yield Path(line)
+        return
+    pending = ""
+    while True:
+        chunk = stream.read(65536)
+        if not chunk:
+            break
+        *paths, pending = (pending + chunk).split("\0")
+        for path in paths:
+            if path:
+                yield Path(path)
+    if pending:
+        yield Path(pending)
+
+
+def discover_pkgbuilds(root: Path):
+    """Walk `root` yielding PKGBUILD paths, skipping hidden directories."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        if "PKGBUILD" in filenames:
+            yield Path(dirpath) / "PKGBUILD"
+
+
+# --- Static PKGBUILD parser ---
+# Most PKGBUILDs are plain assignments plus function definitions. Those can be
+# evaluated without bash; anything that would need a shell to get right makes
+# the parser give up so the file is sourced as usual.
+
+_SHELL_NAME_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_SHELL_ASSIGN_RE = re.compile(r"([A-Za-z_][A-Za-z0-9_]*)(\+?)=")
+_SHELL_FUNC_NAME_RE = re.compile(r"[A-Za-z0-9_.:+@-]+")
+_SHELL_OPERATOR_RE = re.compile(
+    r";;|&&|\|\||\|&|<<<|<<-|<<|>>|<&|>&|&>|>\||[;&|()<>\n]"
+)
+_SHELL_OPERATOR_CHARS = set(";&|()<>\n")
+# Blanks, line continuations and comments between tokens
+_SHELL_BLANK_RE = re.compile(r"(?:[ \t]+|\\\n|#[^\n]*)*")
+_SHELL_WORD_BREAK = set(" \t\n;&|()<>")
+_SHELL_PLAIN_RUN_RE = re.compile(r"[^ \t\n;&|()<>\\'\"$`]+")
+_SHELL_DQUOTE_RUN_RE = re.compile(r"[^\"\\$`]+")
+_SHELL_IFS = set(" \t\n")
+_SHELL_GLOB_CHARS = set("*?[")
+# ${name:off[:len]}, ${name#pat} and friends, ${name/pat/rep} and case
+# modification, restricted to operands with nothing left to expand. `&` is
+# excluded from replacements because of bash 5.2's patsub_replacement.
+_SHELL_PARAM_OP_RE = re.compile(
+    r"(?P<name>[A-Za-z_][A-Za-z0-9_]*)(?:"
+    r":(?P<offset>\d*)(?::(?P<length>\d+))?"
+    r"|(?P<trim>##?|%%?)(?P<trim_pat>[^\s$`'\"\\\[(){}]+)"
+    r"|(?P<sub>//?)(?P<sub_pat>[^\s$`'\"\\\[(){}*?/#%]+)/(?P<sub_rep>[^\s$`'\"\\\[(){}&/]*)"
+    r"|(?P<case>\^\^?|,,?))"
+)
+
+
+class StaticParseError(Exception):
+    """The PKGBUILD uses something the static parser will not evaluate."""
+
+
+class _Poisoned:
+    """A variable whose value depends on something only bash could compute."""
+
+    def __init__(self, reason: str):
+        self.reason = reason
+
+
+class _ShellLexer:
+    """
+    Splits shell source into words and operators. A word is a list of
+    (kind, value, quoted) segments where kind is "lit", "var", "param" (a
+    supported ${name<op>} expansion) or "dyn"; "dyn" marks an expansion that
+    needs a real shell (command substitution etc.).
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+        self._pending_heredocs = []
+        self._heredoc_next = None
+
+    def _error(self, msg: str):
+        raise StaticParseError(msg)
+
+    def next_token(self):
+        """Returns (kind, value, start, end); kind is "word", "op" or "eof"."""
+        text = self.text
+        self.pos = _SHELL_BLANK_RE.match(text, self.pos).end()
+        start = self.pos
+        if start >= len(text):
+            if self._pending_heredocs:
+                self._error("unterminated here-document")
+            return ("eof", None, start, start)
+
+        if text[start] in _SHELL_OPERATOR_CHARS:
+            op = _SHELL_OPERATOR_RE.match(text, start).group(0)
+            self.pos = start + len(op)
+            if op == "\n":
+                if self._pending_heredocs:
+                    self._read_heredoc_bodies()
+            elif op in ("<<", "<<-"):
+                self._heredoc_next = op
+            return ("op", op, start, self.pos)
+
+        segments = self._read_word()
+        if self._heredoc_next is not None:
+            delimiter = "".join(value for _, value, _ in segments)
+            self._pending_heredocs.append((delimiter, self._heredoc_next == "<<-"))
+            self._heredoc_next = None
+        return ("word", segments, start, self.pos)
+
+    def _read_heredoc_bodies(self):
+        text = self.text
+        for delimiter, strip_tabs in self._pending_heredocs:
+            while True:
+                if self.pos >= len(text):
+                    self._error("unterminated here-document")
+                end = text.find("\n", self.pos)
+                if end < 0:
+                    end = len(text)
+                line = text[self.pos : end]
+                self.pos = min(end + 1, len(text))
+                if (line.lstrip("\t") if strip_tabs else line) == delimiter:
+                    break
+        self._pending_heredocs = []
+
+    def _read_word(self) -> list:
+        text = self.text
+        segments = []
+        while self.pos < len(text):
+            run = _SHELL_PLAIN_RUN_RE.match(text, self.pos)
+            if run:
+                segments.append(("lit", run.group(0), False))
+                self.pos = run.end()
+                continue
+            c = text[self.pos]
+            if c in _SHELL_WORD_BREAK:
+                break
+            if c == "\\":
+                if text.startswith("\\\n", self.pos):
+                    self.pos += 2
+                elif self.pos + 1 < len(text):
+                    segments.append(("lit", text[self.pos + 1], True))
+                    self.pos += 2
+                else:
+                    segments.append(("lit", "\\", False))
+                    self.pos += 1
+            elif c == "'":
+                end = text.find("'", self.pos + 1)
+                if end < 0:
+                    self._error("unterminated single quote")
+                segments.append(("lit", text[self.pos + 1 : end], True))
+                self.pos = end + 1
+            elif c == '"':
+                self.pos += 1
+                segments.extend(self._read_double_quoted())
+            elif c == "$":
+                segments.append(self._read_dollar(quoted=False))
+            else:
+                self._skip_backticks()
+                segments.append(("dyn", "backtick command substitution", False))
+        return segments
+
+    def _read_double_quoted(self) -> list:
+        text = self.text
+        segments = []
+        while True:
+            if self.pos >= len(text):
+                self._error("unterminated double quote")
+            c = text[self.pos]
+            if c == '"':
+                self.pos += 1
+                return segments
+            run = _SHELL_DQUOTE_RUN_RE.match(text, self.pos)
+            if run:
+                segments.append(("lit", run.group(0), True))
+                self.pos = run.end()
+            elif c == "\\" and self.pos + 1 < len(text):
+                nxt = text[self.pos + 1]
+                if nxt == "\n":
+                    pass
+                elif nxt in '$`"\\':
+                    segments.append(("lit", nxt, True))
+                else:
+                    segments.append(("lit", "\\" + nxt, True))
+                self.pos += 2
+            elif c == "$":
+                segments.append(self._read_dollar(quoted=True))
+            elif c == "`":
+                self._skip_backticks()
+                segments.append(("dyn", "backtick command substitution", True))
+            else:
+                segments.append(("lit", c, True))
+                self.pos += 1
+
+    def _read_dollar(self, quoted: bool):
+        text = self.text
+        nxt = text[self.pos + 1] if self.pos + 1 < len(text) else ""
+        if nxt == "(":
+            kind = (
+                "arithmetic expansion"
+                if text.startswith("$((", self.pos)
+                else ("command substitution")
+            )
+            self.pos += 1
+            self._skip_balanced("(", ")")
+            return ("dyn", kind, quoted)
+        if nxt == "{":
+            self.pos += 1
+            start = self.pos + 1
+            self._skip_balanced("{", "}")
+            inner = text[start : self.pos - 1]
+            if _SHELL_NAME_RE.fullmatch(inner):
+                return ("var", inner, quoted)
+            if _SHELL_PARAM_OP_RE.fullmatch(inner):
+                return ("param", inner, quoted)
+            return ("dyn", f"parameter expansion ${{{inner}}}", quoted)
+        match = _SHELL_NAME_RE.match(text, self.pos + 1)
+        if match:
+            self.pos = match.end()
+            return ("var", match.group(0), quoted)
+        if nxt and (nxt.isdigit() or nxt in "@*#?$!-"):
+            self.pos += 2
+            return ("dyn", f"special parameter ${nxt}", quoted)
+        if nxt in ("'", '"') and not quoted:
+            self.pos += 1
+            self._read_word_quote(nxt)
+            return ("dyn", "locale or ANSI-C quoting", quoted)
+        self.pos += 1
+        return ("lit", "$", quoted)
+
+    def _read_word_quote(self, quote: str):
+        text = self.text
+        self.pos += 1
+        while self.pos < len(text):
+            c = text[self.pos]
+            if c == "\\":
+                self.pos += 2
+                continue
+            self.pos += 1
+            if c == quote:
+                return
+        self._error("unterminated quote")
+
+    def _skip_backticks(self):
+        self._read_word_quote("`")
+
+    def _skip_balanced(self, opener: str, closer: str):
+        """Skips from an opening bracket at self.pos to its matching closer."""
+        text = self.text
+        depth = 0
+        while self.pos < len(text):
+            c = text[self.pos]
+            if c == "\\":
+                self.pos += 2
+                continue
+            if c == "'" and opener == "(":
+                end = text.find("'", self.pos + 1)
+                if end < 0:
+                    break
+                self.pos = end + 1
+                continue
+            if c in ('"', "`"):
+                self._read_word_quote(c)
+                continue
+            self.pos += 1
+            if c == opener:
+                depth += 1
+            elif c == closer:
+                depth -= 1
+                if depth == 0:
+                    return
+        self._error(f"unbalanced '{opener}'")
+
+
+class StaticPkgbuildParser:
+    """
+    Evaluates the top level of a PKGBUILD without running it. Only variable
+    assignments, function definitions and comments are accepted; any other
+    top-level statement raises StaticParseError. Values that need a shell to
+    compute (command substitution, ${...} operators, globbing, unset variables)
+    are poisoned rather than rejected outright, so they only matter if one of
+    the extracted variables depends on them.
+    """
+
+    def __init__(self, text: str):
+        self.lexer = _ShellLexer(text)
+        self.variables = {}
+        self._peeked = None
+
+    def _next(self):
+        if self._peeked is not None:
+            tok, self._peeked = self._peeked, None
+            return tok
+        return self.lexer.next_token()
+
+    def _peek(self):
+        if self._peeked is None:
+            self._peeked = self.lexer.next_token()
+        return self._peeked
+
+    def parse(self) -> dict:
+        while True:
+            kind, value, start, end = self._next()
+            if kind == "eof":
+                return self.variables
+            if kind == "op":
+                if value in ("\n", ";"):
+                    continue
+                raise StaticParseError(f"top-level operator '{value.strip()}'")
+            self._statement(value, end)
+
+    def _statement(self, segments: list, end: int):
+        literal = _plain_literal(segments)
+        if literal == "function":
+            kind, name_segments, _, _ = self._next()
+            name = _plain_literal(name_segments) if kind == "word" else None
+            if not name:
+                raise StaticParseError("malformed function definition")
+            if self._peek()[1] == "(":
+                self._expect_function_parens()
+            self._skip_function_body()
+            return
+        if (
+            literal
+            and _SHELL_FUNC_NAME_RE.fullmatch(literal)
+            and self._peek()[1] == "("
+        ):
+            self._expect_function_parens()
+            self._skip_function_body()
+            return
+
+        while True:
+            if not self._assignment(segments, end):
+                what = literal or "".join(v for k, v, _ in segments if k == "lit")
+                raise StaticParseError(f"top-level command '{what}'")
+            kind, value, _, end = self._next()
+            if kind == "eof" or (kind == "op" and value in ("\n", ";")):
+                return
+            if kind == "op":
+                raise StaticParseError(f"top-level operator '{value.strip()}'")
+            segments = value
+            literal = _plain_literal(segments)
+
+    def _expect_function_parens(self):
+        self._next()
+        kind, value, _, _ = self._next()
+        if kind != "op" or value != ")":
+            raise StaticParseError("malformed function definition")
+
+    def _skip_function_body(self):
+        kind, value, _, _ = self._next()
+        while kind == "op" and value == "\n":
+            kind, value, _, _ = self._next()
+        if kind != "word" or _plain_literal(value) != "{":
+            raise StaticParseError("function body is not a { ... } group")
+        depth = 1
+        while depth:
+            kind, value, _, _ = self._next()
+            if kind == "eof":
+                raise StaticParseError("unterminated function body")
+            if kind == "word":
+                word = _plain_literal(value)
+                if word == "{":
+                    depth += 1
+                elif word == "}":
+                    depth -= 1
+
+    def _assignment(self, segments: list, end: int) -> bool:
+        if not segments or segments[0][0] != "lit" or segments[0][2]:
+            return False
+        match = _SHELL_ASSIGN_RE.match(segments[0][1])
+        if not match:
+            return False
+        name, append = match.group(1), bool(match.group(2))
+        remainder = segments[0][1][match.end() :]
+        rest = ([("lit", remainder, False)] if remainder else []) + segments[1:]
+
+        peek_kind, peek_value, peek_start, _ = self._peek()
+        if not rest and peek_kind == "op" and peek_value == "(" and peek_start == end:
+            self._next()
+            new_value = self._array_elements()
+        else:
+            new_value = _expand_word(rest, self.variables, in_array=False)
+            if new_value is not None and not isinstance(new_value, _Poisoned):
+                new_value = new_value[0]
+
+        old_value = self.variables.get(name)
+        if append and old_value is not None:
+            new_value = _append_value(old_value, new_value)
+        self.variables[name] = new_value
+        return True
+
+    def _array_elements(self):
+        elements = []
+        poisoned = None
+        while True:
+            kind, value, _, _ = self._next()
+            if kind == "eof":
+                raise StaticParseError("unterminated array")
+            if kind == "op":
+                if value == ")":
+                    return poisoned or elements
+                if value == "\n":
+                    continue
+                raise StaticParseError(f"operator '{value.strip()}' inside array")
+            expanded = _expand_word(value, self.variables, in_array=True)
+            if isinstance(expanded, _Poisoned):
+                poisoned = poisoned or expanded
+            else:
+                elements.extend(expanded)
+
+
+def _plain_literal(segments: list):
+    """The word's text if it is made only of unquoted literal characters."""
+    if len(segments) == 1:
+        kind, value, quoted = segments[0]
+        return value if kind == "lit" and not quoted else None
+    if segments and all(kind == "lit" and not quoted for kind, _, quoted in segments):
+        return "".join(value for _, value, _ in segments)
+    return None
+
+
+def _append_value(old, new):
+    if isinstance(old, _Poisoned):
+        return old
+    if isinstance(new, _Poisoned):
+        return new
+    if isinstance(old, list):
+        if isinstance(new, list):
+            return old + new
+        return ([(old[0] if old else "") + new] + old[1:]) if old else [new]
+    if isinstance(new, list):
+        return [old] + new
+    return old + new
+
+
+def _expand_word(segments: list, variables: dict, in_array: bool):
+    """
+    Expands one word the way bash would in an assignment (in_array=False) or
+    an array element (in_array=True). Returns a list of resulting words, or a
+    _Poisoned marker if bash would have to be consulted.
+    """
+    parts = []
+    has_quoted = False
+    has_expansion = False
+    for index, (kind, value, quoted) in enumerate(segments):
+        has_quoted = has_quoted or quoted
+        if kind == "dyn":
+            return _Poisoned(value)
+        if kind == "lit":
+            if not quoted:
+                if index == 0 and value.startswith("~"):
+                    return _Poisoned("tilde expansion")
+                if in_array and any(
+                    ch in _SHELL_GLOB_CHARS or ch == "{" for ch in value
+                ):
+                    return _Poisoned("glob or brace expansion in array")
+            parts.append(value)
+            continue
+        has_expansion = True
+        if kind == "param":
+            match = _SHELL_PARAM_OP_RE.fullmatch(value)
+            value = match.group("name")
+        var_value = variables.get(value)
+        if var_value is None:
+            return _Poisoned(f"unset variable ${value}")
+        if isinstance(var_value, _Poisoned):
+            return var_value
+        if isinstance(var_value, list):
+            var_value = var_value[0] if var_value else ""
+        if kind == "param":
+            var_value = _apply_param_op(var_value, match)
+        if in_array and not quoted:
+            if any(ch in _SHELL_IFS or ch in _SHELL_GLOB_CHARS for ch in var_value):
+                return _Poisoned("word splitting in array")
+        parts.append(var_value)
+    word = "".join(parts)
+    if in_array and not word and has_expansion and not has_quoted:
+        return []
+    return [word]
+
+
+def _shell_pattern_regex(pattern: str):
+    regex = "".join(
+        ".*" if ch == "*" else "." if ch == "?" else re.escape(ch) for ch in pattern
+    )
+    return re.compile(regex, re.DOTALL)
+
+
+def _apply_param_op(value: str, match) -> str:
+    """Evaluates a ${name<op>} expansion accepted by _SHELL_PARAM_OP_RE."""
+    if match.group("offset") is not None:
+        offset = int(match.group("offset") or 0)
+        length = match.group("length")
+        end = None if length is None else offset + int(length)
+        return value[offset:end]
+    if match.group("trim"):
+        op, pattern = match.group("trim"), _shell_pattern_regex(match.group("trim_pat"))
+        if op.startswith("#"):
+            cuts = range(len(value) + 1) if op == "#" else range(len(value), -1, -1)
+            for cut in cuts:
+                if pattern.fullmatch(value[:cut]):
+                    return value[cut:]
+        else:
+            cuts = range(len(value), -1, -1) if op == "%" else range(len(value) + 1)
+            for cut in cuts:
+                if pattern.fullmatch(value[cut:]):
+                    return value[:cut]
+        return value
+    if match.group("sub"):
+        count = -1 if match.group("sub") == "//" else 1
+        return value.replace(match.group("sub_pat"), match.group("sub_rep"), count)
+    op = match.group("case")
+    if op == "^":
+        return value[:1].upper() + value[1:]
+    if op == "^^":
+        return value.upper()
+    if op == ",":
+        return value[:1].lower() + value[1:]
+    return value.lower()
+
+
+def static_extract_pkgbuild(pkgbuild_filepath: Path, fields=DEFAULT_FIELDS) -> dict:
+    """
+    Extracts the same data as process_single_pkgbuild without running bash.
+    Raises StaticParseError when the file has to be sourced instead.
+    """
+    try:
+        text = pkgbuild_filepath.read_bytes().decode("utf-8")
+    except UnicodeDecodeError:
+        raise StaticParseError("not valid UTF-8")
+    variables = StaticPkgbuildParser(text).parse()
+    raw = {}
+    for field in fields:
+        kind, names = EXTRACT_FIELDS[field]
+        for name in names:
+            value = variables.get(name)
+            if isinstance(value, _Poisoned):
+                raise StaticParseError(f"{name}: {value.reason}")
+            if kind == "scalar":
+                # "${name}" is the first element when the variable is an array
+                if isinstance(value, list):
+                    value = value[0] if value else ""
+                raw[name] = [value or ""]
+            elif value is None:
+                raw[name] = []
+            else:
+                raw[name] = value if isinstance(value, list) else [value]
+    return _finish_result(pkgbuild_filepath, normalize_fields(raw))
+
+
+def run_with_process_pool(
+    pkgbuild_files, jobs: int, extract_script: str = BASH_EXTRACT_SCRIPT
+):
+    """
+    Extract PKGBUILDs with one `bash -c` per file from a Python process pool.
+    Paths are submitted as `pkgbuild_files` yields them, keeping a bounded
+    number in flight, so extraction overlaps discovery of the remaining files.
+    """
+
+    def finished(done_futures):
+        for future in done_futures:
+            pkgbuild_file = in_flight.pop(future)
+            try:
+                yield pkgbuild_file, future.result()
+            except Exception as exc:
+                yield pkgbuild_file, {
+                    "pkgfile": str(pkgbuild_file),
+                    "error": f"Worker process for {pkgbuild_file} generated an exception: {exc}",
+                }
+
+    in_flight = {}
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for filepath in pkgbuild_files:
+            future = executor.submit(process_single_pkgbuild, filepath, extract_script)
+            in_flight[future] = filepath
+            if len(in_flight) >= jobs * 4:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                yield from finished(done)
+        yield from finished(as_completed(list(in_flight)))
+
+
+def log_profile(timings: list, top_n: int, elapsed: float):
+    """Log per-path totals and the slowest PKGBUILDs from (timing, pkgfile) pairs."""
+    totals = {}
+    for timing, _ in timings:
+        total = totals.setdefault(timing["via"], Counter())
+        total["files"] += 1
+        for key in ("wall", "user", "sys"):
+            total[key] += timing[key]
+    logger.info(f"Profile: {len(timings)} PKGBUILD(s) in {elapsed:.2f}s.")
+    for via in ("bash", "static", "cache"):
+        if via in totals:
+            t = totals[via]
+            logger.info(
+                f"  {via:<6} {t['files']:>5} file(s), {t['wall']:.2f}s wall "
+                f"({t['user']:.2f}s user, {t['sys']:.2f}s sys)"
+            )
+    if "bash" in totals:
+        logger.info(
+            f"  Time spent waiting on bash: {totals['bash']['wall']:.2f}s "
+            f"across all workers."
+        )
+    slowest = sorted(timings, key=lambda t: t[0]["wall"], reverse=True)[:top_n]
+    if slowest:
+        logger.info(f"Slowest {len(slowest)} PKGBUILD(s):")
+        for timing, pkgfile in slowest:
+            logger.info(
+                f"  {timing['wall']:7.3f}s wall {timing['user']:6.3f}s user "
+                f"{timing['sys']:6.3f}s sys  [{timing['via']}] {pkgfile}"
+            )
 
 
 def main():
@@ -184,9 +1292,27 @@ def main():
         "pkgbuild_files",
         metavar="FILE",
         type=Path,
-        nargs="+",
+        nargs="*",
         help="Path to one or more PKGBUILD files.",
     )
+    parser.add_argument(
+        "--files-from",
+        metavar="LIST",
+        default=None,
+        help="Read PKGBUILD paths from LIST ('-' for stdin), one per line. Paths are processed as they are read.",
+    )
+    parser.add_argument(
+        "-0",
+        "--null",
+        action="store_true",
+        help="Paths in --files-from are NUL-separated instead of newline-separated.",
+    )
+    parser.add_argument(
+        "--root",
+        type=Path,
+        default=None,
+        help="Walk DIR for PKGBUILD files (hidden directories are skipped) and process them as they are found.",
+    )
     parser.add_argument(
         "-j",
         "--jobs",
@@ -194,36 +1320,191 @@ def main():
         default=os.cpu_count() or 1,
         help="Number of bash processes to spawn concurrently (default: number of CPU cores).",
     )
+    parser.add_argument(
+        "--backend",
+        choices=["process", "coproc"],
+        default="process",
+        help="'process' runs one `bash -c` per PKGBUILD from a Python process pool; "
+        "'coproc' feeds paths to JOBS long-lived bash workers that source each file in a forked subshell.",
+    )
+    parser.add_argument(
+        "--static",
+        action="store_true",
+        help="Parse plain-assignment PKGBUILDs in Python and only source the rest with bash.",
+    )
+    parser.add_argument(
+        "--fields",
+        default=",".join(DEFAULT_FIELDS),
+        help="Comma-separated fields to extract, or 'all'. pkgbase, pkgname and pkgfile are always included. "
+        f"Available: {', '.join(EXTRACT_FIELDS)}.",
+    )
+    parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="Write one JSON object per line as each PKGBUILD finishes instead of a sorted JSON array at the end.",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="N",
+        type=int,
+        nargs="?",
+        const=10,
+        default=None,
+        help="Log a timing summary with the N slowest PKGBUILDs (default N: 10).",
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="Enable debug logging."
+    )
+    parser.add_argument(
+        "--cache-file",
+        type=Path,
+        default=None,
+        help="Persistent result cache keyed by PKGBUILD content hash. Cache hits skip bash entirely.",
+    )
+    parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=DEFAULT_CACHE_MAX_ENTRIES,
+        help=f"Maximum number of cached results kept, least recently used are evicted first (default: {DEFAULT_CACHE_MAX_ENTRIES}).",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Discard all cached results before processing.",
+    )
 
     args = parser.parse_args()
 
+    if args.verbose:
+        logger.setLevel(logging.DEBUG)
     if args.jobs < 1:
         parser.error("Number of jobs must be at least 1.")
+    if args.cache_max_entries < 1:
+        parser.error("Cache size must be at least 1.")
+    if not (args.pkgbuild_files or args.files_from or args.root):
+        parser.error("Give PKGBUILD files, --files-from or --root.")
+    if args.null and not args.files_from:
+        parser.error("-0/--null only applies to --files-from.")
+    try:
+        fields = resolve_fields(
+            EXTRACT_FIELDS
+            if args.fields == "all"
+            else [f.strip() for f in args.fields.split(",") if f.strip()]
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    extract_script = build_extract_script(fields)
 
-    results = []
+    def input_files():
+        yield from args.pkgbuild_files
+        if args.files_from == "-":
+            yield from iter_file_list(sys.stdin, args.null)
+        elif args.files_from:
+            with open(args.files_from, "r", newline="" if args.null else None) as f:
+                yield from iter_file_list(f, args.null)
+        if args.root:
+            yield from discover_pkgbuilds(args.root)
 
-    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
-        future_to_pkgbuild = {
-            executor.submit(process_single_pkgbuild, filepath): filepath
-            for filepath in args.pkgbuild_files
-        }
+    results = []
+    timings = []
+    started = time.monotonic()
+    # Cache hits and static results are emitted from the feeder thread while
+    # bash results are emitted here, so output and cache writes are serialized.
+    emit_lock = threading.Lock()
 
-        for future in as_completed(future_to_pkgbuild):
-            pkgbuild_file = future_to_pkgbuild[future]
-            try:
-                data = future.result()
+    def emit(data, cache_key=None):
+        with emit_lock:
+            if cache is not None and cache_key is not None:
+                cache.put(cache_key, data)
+            if args.profile is not None and "timing" in data:
+                timings.append((data["timing"], data.get("pkgfile", "")))
+            if args.ndjson:
+                sys.stdout.write(json.dumps(data) + "\n")
+                sys.stdout.flush()
+            else:
                 results.append(data)
-            except Exception as exc:
-                results.append(
-                    {
-                        "pkgfile": str(pkgbuild_file),
-                        "error": f"Worker process for {pkgbuild_file} generated an exception: {exc}",
-                    }
-                )
 
-    results.sort(key=lambda x: x.get("pkgfile", ""))
-    json.dump(results, sys.stdout, indent=2)
-    print()
+    cache = None
+    if args.cache_file:
+        cache = ResultCache(args.cache_file, args.cache_max_entries)
+        if args.clear_cache:
+            cache.clear()
+        else:
+            cache.load()
+
+    cache_keys = {}
+    static_counts = Counter()
+    fallback_reasons = Counter()
+
+    def files_needing_bash():
+        for filepath in input_files():
+            file_started, usage_before = time.monotonic(), _thread_rusage()
+            key = None
+            if cache is not None:
+                try:
+                    key = pkgbuild_cache_key(filepath, extract_script)
+                except OSError as e:
+                    logger.warning(f"Cannot hash '{filepath}' for caching: {e}")
+                else:
+                    cached = cache.get(key)
+                    if cached is not None:
+                        cached["pkgfile"] = str(filepath)
+                        cached["timing"] = _timing_since(
+                            "cache", file_started, usage_before
+                        )
+                        emit(cached)
+                        continue
+            if args.static:
+                static_counts["tried"] += 1
+                try:
+                    data = static_extract_pkgbuild(filepath, fields)
+                except (StaticParseError, OSError) as e:
+                    logger.debug(f"Static parse of '{filepath}' fell back to bash: {e}")
+                    fallback_reasons[str(e)] += 1
+                else:
+                    static_counts["parsed"] += 1
+                    data = add_comment_fields(filepath, data, fields)
+                    data["timing"] = _timing_since("static", file_started, usage_before)
+                    emit(data, key)
+                    continue
+            if key is not None:
+                cache_keys[filepath] = key
+            yield filepath
+
+    if args.backend == "coproc":
+        extractions = run_with_bash_workers(
+            files_needing_bash(), args.jobs, extract_script
+        )
+    else:
+        extractions = run_with_process_pool(
+            files_needing_bash(), args.jobs, extract_script
+        )
+
+    for pkgbuild_file, data in extractions:
+        data = add_comment_fields(pkgbuild_file, data, fields)
+        emit(data, cache_keys.get(pkgbuild_file))
+
+    if args.static and static_counts["tried"]:
+        tried, parsed = static_counts["tried"], static_counts["parsed"]
+        logger.info(
+            f"Static parser: {parsed}/{tried} PKGBUILD(s) took the fast path, {tried - parsed} sent to bash."
+        )
+        for reason, count in fallback_reasons.most_common():
+            logger.debug(f"  {count} x {reason}")
+
+    if cache is not None:
+        cache.save()
+        logger.debug(
+            f"Result cache: {cache.hits} hit(s), {cache.misses} miss(es) ({args.cache_file})."
+        )
+
+    if args.profile is not None:
+        log_profile(timings, args.profile, time.monotonic() - started)
+
+    if not args.ndjson:
+        results.sort(key=lambda x: x.get("pkgfile", ""))
+        json.dump(results, sys.stdout, indent=2)
+        print()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# The scripts are standalone files, not an installed package
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
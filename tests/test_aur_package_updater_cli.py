@@ -0,0 +1,101 @@
+"""Streaming decoders for the AUR metadata dump."""
+
+import gzip
+import json
+import random
+
+import pytest
+
+updater = pytest.importorskip("aur_package_updater_cli")
+
+RECORDS = [
+    {"Name": "foo", "Version": "1.0-1", "Depends": ["bar>=2", "baz"]},
+    {"Name": "ünïcödé", "Description": '漢字 and "quotes", [brackets] {braces}'},
+    {"Name": "empty", "Keywords": [], "URL": None},
+    [1, 2.5, True, "nested"],
+    "a plain string, with a comma",
+    12345,
+    -6.25e3,
+    True,
+    None,
+]
+DOCUMENT = json.dumps(RECORDS, ensure_ascii=False, indent=1)
+
+
+def chunked(text, sizes):
+    pos = 0
+    for size in sizes:
+        if pos >= len(text):
+            return
+        yield text[pos : pos + size]
+        pos += size
+    yield text[pos:]
+
+
+def test_iter_json_array_whole_document():
+    assert list(updater.iter_json_array([DOCUMENT])) == RECORDS
+
+
+def test_iter_json_array_one_character_chunks():
+    assert list(updater.iter_json_array(iter(DOCUMENT))) == RECORDS
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_iter_json_array_random_chunks(seed):
+    rng = random.Random(seed)
+    sizes = [rng.randint(0, 40) for _ in range(len(DOCUMENT))]
+    assert list(updater.iter_json_array(chunked(DOCUMENT, sizes))) == RECORDS
+
+
+@pytest.mark.parametrize("document", ["[]", " [ ] \n", "\n[\n]"])
+def test_iter_json_array_empty(document):
+    assert list(updater.iter_json_array(iter(document))) == []
+
+
+@pytest.mark.parametrize(
+    "document, message",
+    [
+        ('{"Name": "foo"}', "Expected a JSON array"),
+        ("[1 2]", "Expected ',' or ']'"),
+        ("[1,,2]", "Expecting value"),
+        ("[1, 2]]", "Extra data after JSON array"),
+        ('[1, {"Name": "fo', "Unterminated string"),
+        ('[1, {"Name": ', "Expecting value"),
+        ("[1, 2", "Unterminated JSON array"),
+        ("", "Unterminated JSON array"),
+    ],
+)
+@pytest.mark.parametrize("split", [False, True], ids=["whole", "split"])
+def test_iter_json_array_malformed(document, message, split):
+    chunks = iter(document) if split else [document]
+    with pytest.raises(json.JSONDecodeError, match=message):
+        list(updater.iter_json_array(chunks))
+
+
+def test_iter_json_array_oversized_record(monkeypatch):
+    monkeypatch.setattr(updater, "MAX_JSON_RECORD_BYTES", 16)
+    with pytest.raises(json.JSONDecodeError):
+        list(updater.iter_json_array(iter('["' + "x" * 64)))
+
+
+def byte_chunks(data, size):
+    return (data[i : i + size] for i in range(0, len(data), size))
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 4096])
+def test_gunzip_text_chunks(size):
+    compressed = gzip.compress(DOCUMENT.encode("utf-8"))
+    text = "".join(updater._gunzip_text_chunks(byte_chunks(compressed, size)))
+    assert text == DOCUMENT
+
+
+def test_gunzip_text_chunks_feeds_iter_json_array():
+    compressed = gzip.compress(DOCUMENT.encode("utf-8"))
+    chunks = updater._gunzip_text_chunks(byte_chunks(compressed, 5))
+    assert list(updater.iter_json_array(chunks)) == RECORDS
+
+
+def test_gunzip_text_chunks_truncated():
+    compressed = gzip.compress(DOCUMENT.encode("utf-8"))
+    with pytest.raises(EOFError):
+        list(updater._gunzip_text_chunks(byte_chunks(compressed[:-12], 5)))
@@ -0,0 +1,111 @@
+"""The static PKGBUILD parser must agree with bash or decline the file."""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+import pkgbuild_to_json as p2j
+from conftest import REPO_ROOT
+
+pytestmark = pytest.mark.skipif(shutil.which("bash") is None, reason="needs bash")
+
+MAINTAINED_PKGBUILDS = sorted((REPO_ROOT / "maintain").glob("*/*/PKGBUILD"))
+
+
+def sourced(pkgbuild):
+    data = p2j.process_single_pkgbuild(pkgbuild)
+    data.pop("timing", None)
+    return data
+
+
+def assert_static_agrees_or_declines(pkgbuild):
+    """Returns the static result, or None if the parser sent it to bash."""
+    try:
+        data = p2j.static_extract_pkgbuild(pkgbuild)
+    except p2j.StaticParseError:
+        return None
+    expected = sourced(pkgbuild)
+    assert "error" not in expected, expected["error"]
+    assert data == expected
+    return data
+
+
+@pytest.mark.parametrize(
+    "pkgbuild",
+    MAINTAINED_PKGBUILDS,
+    ids=[path.parent.name for path in MAINTAINED_PKGBUILDS],
+)
+def test_maintained_pkgbuilds(pkgbuild):
+    assert_static_agrees_or_declines(pkgbuild)
+
+
+def test_most_maintained_pkgbuilds_take_the_fast_path():
+    parsed = 0
+    for pkgbuild in MAINTAINED_PKGBUILDS:
+        try:
+            p2j.static_extract_pkgbuild(pkgbuild)
+            parsed += 1
+        except p2j.StaticParseError:
+            pass
+    assert parsed >= len(MAINTAINED_PKGBUILDS) // 2
+
+
+BASE = "pkgname=demo\npkgrel=1\narch=(any)\n"
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        pytest.param("pkgver=$(date +%Y.%m)\n", id="command-substitution"),
+        pytest.param("pkgver=`echo 1.2`\n", id="backticks"),
+        pytest.param("pkgver=$((1 + 2))\n", id="arithmetic"),
+        pytest.param(
+            "pkgver=1.0\n_bump() { pkgver=2.0; }\n_bump\n", id="function-call"
+        ),
+        pytest.param(
+            "pkgver=1.0\nfunction _bump { pkgver+=.1; }\n_bump\n",
+            id="function-keyword-call",
+        ),
+        pytest.param("pkgver=1.0\n_bump() { pkgver=2.0; }\n", id="function-uncalled"),
+        pytest.param("_v=a.b.a\npkgver=${_v//a/b}\n", id="replace-all"),
+        pytest.param("_v=a.b.a\npkgver=${_v/a/b}\n", id="replace-first"),
+        pytest.param("_v=a-b\npkgver=${_v//-/.}\n", id="replace-dash"),
+        pytest.param("_v=1.2.3\npkgver=${_v%.*}\n", id="trim-suffix"),
+        pytest.param("pkgver=1.0\n[[ -n $CARCH ]] && pkgver=2.0\n", id="conditional"),
+        pytest.param("pkgver=1.0\nif true; then pkgver=2.0; fi\n", id="if-block"),
+        pytest.param("pkgver=1.0\neval 'pkgver=2.0'\n", id="eval"),
+        pytest.param("pkgver=1.0\ndeclare pkgver=2.0\n", id="declare"),
+        pytest.param("pkgver=1.0\nsource=(a.tar.gz b{1,2}.patch)\n", id="brace"),
+        pytest.param("_s='a b'\npkgver=1.0\nsource=($_s)\n", id="word-splitting"),
+        pytest.param("pkgver=1.0\ncat <<EOF\npkgver=2.0\nEOF\n", id="heredoc"),
+    ],
+)
+def test_poisoned_constructs(tmp_path, body):
+    pkgbuild = tmp_path / "PKGBUILD"
+    pkgbuild.write_text(BASE + body)
+    assert_static_agrees_or_declines(pkgbuild)
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        "pkgver=$(date +%Y.%m)\n",
+        "pkgver=1.0\n_bump() { pkgver=2.0; }\n_bump\n",
+    ],
+    ids=["command-substitution", "function-call"],
+)
+def test_changed_by_code_is_declined(tmp_path, body):
+    pkgbuild = tmp_path / "PKGBUILD"
+    pkgbuild.write_text(BASE + body)
+    with pytest.raises(p2j.StaticParseError):
+        p2j.static_extract_pkgbuild(pkgbuild)
+
+
+@pytest.mark.parametrize(
+    "op, expected",
+    [("_v//a/b", "b.b.b"), ("_v/a/b", "b.b.a"), ("_v%.*", "a.b"), ("_v^^", "A.B.A")],
+)
+def test_expand_word_param_ops(op, expected):
+    segments = [("param", op, False)]
+    assert p2j._expand_word(segments, {"_v": "a.b.a"}, False) == [expected]